@@ -117,8 +117,11 @@ def calcular_elasticidade_por_estado(
     
     resultados = {}
     
+    # Ordena e agrupa uma vez, em vez de filtrar o DataFrame inteiro por estado
+    series = dict(tuple(df.sort_values('ano', kind='stable').groupby('estado', sort=False)))
+    
     for estado in df['estado'].unique():
-        df_estado = df[df['estado'] == estado].sort_values('ano')
+        df_estado = series[estado]
         
         if len(df_estado) < 5:  # Mínimo de 5 observações
             continue
@@ -174,8 +177,11 @@ def calcular_elasticidade_painel(
     
     resultados = []
     
+    # Ordena e agrupa uma vez, em vez de filtrar o DataFrame inteiro por estado
+    series = dict(tuple(df.sort_values('ano', kind='stable').groupby('estado', sort=False)))
+    
     for estado in df['estado'].unique():
-        df_estado = df[df['estado'] == estado].sort_values('ano')
+        df_estado = series[estado]
         
         if len(df_estado) < 3:
             continue
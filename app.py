@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 """
 Otimização de Recursos de Segurança Pública - Trabalho de Pesquisa Operacional
-Programação Linear (Simplex) para alocação ótima entre estados brasileiros.
+Programação Linear (forma fechada) para alocação ótima entre estados brasileiros.
 """
 
 import streamlit as st
@@ -29,7 +29,7 @@ from sensibilidade import (
     analisar_cenarios,
     gerar_grafico_tornado
 )
-from monte_carlo import executar_monte_carlo
+from monte_carlo import executar_monte_carlo, histograma_barras
 from backtesting import executar_backtest, validar_modelo_rolling
 from multi_periodo import otimizar_multi_periodo, comparar_estrategias
 from dea import calcular_dea_ccr, identificar_benchmarks, calcular_metas, resumo_dea
@@ -111,6 +111,57 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+# Formatos das tabelas (Styler.format ou formatar_tabela) reutilizados entre reruns
+FMT_DASHBOARD = {
+    'População': '{:,.0f}',
+    'Mortes Violentas': '{:,.0f}',
+    'Taxa/100k': '{:.1f}',
+    'Orçamento (R$ mi)': 'R$ {:,.1f}',
+    'Gasto/Capita': 'R$ {:,.0f}'
+}
+
+FMT_ALOCACAO = {
+    'Investimento (R$ mi)': 'R$ {:,.2f}',
+    'Mortes Antes': '{:,.0f}',
+    'Mortes Depois': '{:,.0f}',
+    'Vidas Salvas': '{:,.0f}',
+    'Redução %': '{:.2f}%'
+}
+
+FMT_EFICIENCIA = {
+    'Investimento (R$ mi)': 'R$ {:,.2f}',
+    'Vidas Salvas': '{:,.0f}',
+    'Custo/Vida': 'R$ {:,.2f}'
+}
+
+FMT_CENARIOS = {
+    'Vidas Salvas': '{:,.0f}',
+    'Diferença': '{:+,.0f}'
+}
+
+FMT_PERCENTIS = {'Vidas Salvas': '{:,.0f}'}
+
+FMT_ESTRATEGIAS = {
+    'Crimes Evitados': '{:,.0f}',
+    'Redução Período 1': '{:,.0f}',
+    'Redução Último Período': '{:,.0f}'
+}
+
+FMT_RANKING_DEA = {
+    'Gasto/capita': 'R$ {:,.0f}',
+    'Taxa/100k': '{:.1f}',
+    'Eficiência %': '{:.1f}%'
+}
+
+
+def formatar_tabela(df: pd.DataFrame, formatos: dict) -> pd.DataFrame:
+    """Aplica os formatos como colunas de texto, evitando o Styler em tabelas sem estilo."""
+    df = df.copy()
+    for coluna, fmt in formatos.items():
+        df[coluna] = df[coluna].map(fmt.format)
+    return df
+
+
 @st.cache_data
 def carregar_dados(ano: int = 2022):
     """Carrega dados consolidados com elasticidade via regressão."""
@@ -141,9 +192,9 @@ def carregar_dados_todos_anos():
     return df
 
 
-@st.cache_data
+@st.cache_resource
 def carregar_geojson_brasil():
-    """Carrega GeoJSON dos estados brasileiros."""
+    """Carrega GeoJSON dos estados brasileiros (objeto único, somente leitura, compartilhado entre sessões)."""
     url = "https://raw.githubusercontent.com/codeforamerica/click_that_hood/master/public/data/brazil-states.geojson"
     
     try:
@@ -162,6 +213,38 @@ def obter_otimizacao_padrao(_df):
     return otimizar_alocacao(_df, orcamento_disponivel=5000, verbose=False)
 
 
+@st.cache_data(show_spinner=False)
+def obter_otimizacao(_df, ano: int, orcamento: float, inv_min_pct: float, inv_max_pct: float):
+    """Otimização com parâmetros do usuário (chaveada pelo ano e parâmetros)."""
+    return otimizar_alocacao(
+        df_dados=_df,
+        orcamento_disponivel=orcamento,
+        investimento_minimo_pct=inv_min_pct,
+        investimento_maximo_pct=inv_max_pct,
+        verbose=False
+    )
+
+
+@st.cache_data
+def obter_resumo_regioes(_df, ano: int):
+    """Agregação por região do dashboard (chaveada pelo ano)."""
+    df_regiao = _df.groupby('regiao').agg({
+        'mortes_violentas': 'sum',
+        'populacao': 'sum',
+        'orcamento_2022_milhoes': 'sum'
+    }).reset_index()
+    
+    df_regiao['taxa_regiao'] = df_regiao['mortes_violentas'] / df_regiao['populacao'] * 100000
+    df_regiao['gasto_pc_regiao'] = df_regiao['orcamento_2022_milhoes'] * 1e6 / df_regiao['populacao']
+    return df_regiao
+
+
+@st.cache_data
+def obter_dea(_df, ano: int):
+    """Eficiência DEA dos estados (chaveada pelo ano)."""
+    return calcular_dea_ccr(_df)
+
+
 @st.cache_data
 def obter_sensibilidade_padrao(_df):
     """Análise de sensibilidade com parâmetros padrão."""
@@ -204,6 +287,36 @@ def obter_multiperiodo_padrao(_df):
     return comparar_estrategias(_df, orcamento_total=25000, n_periodos=5)
 
 
+@st.cache_data(show_spinner=False, max_entries=16)
+def obter_monte_carlo(_df, ano: int, orcamento: float, n_simulacoes: int, variacao: int):
+    """
+    Monte Carlo com parâmetros do usuário (chaveado pelo ano e parâmetros).
+    
+    Cada entrada guarda as distribuições completas; max_entries limita a
+    memória quando o usuário varre muitas combinações de orçamento e incerteza.
+    """
+    return executar_monte_carlo(
+        _df,
+        orcamento=orcamento,
+        n_simulacoes=n_simulacoes,
+        incerteza_elasticidade=variacao/100,
+        incerteza_taxa=variacao/200,
+        verbose=False
+    )
+
+
+@st.cache_data(show_spinner=False)
+def obter_backtesting(janela_treino: int):
+    """Backtesting com janela de treino escolhida pelo usuário."""
+    return validar_modelo_rolling(janela_treino=janela_treino, janela_teste=1, ano_inicio=2010, ano_fim=2022)
+
+
+@st.cache_data(show_spinner=False)
+def obter_multiperiodo(_df, ano: int, orcamento_total: float, n_periodos: int):
+    """Multi-período com parâmetros do usuário (chaveado pelo ano e parâmetros)."""
+    return comparar_estrategias(_df, orcamento_total, n_periodos)
+
+
 def render_sidebar():
     """Sidebar com seletor de ano e explicação do modelo."""
     
@@ -257,8 +370,10 @@ def render_sidebar():
         2. Move-se para vértices adjacentes que melhorem a F.O.
         3. Para quando não há mais melhoria possível (ótimo!)
         
-        **Implementação:** Usamos a biblioteca `PuLP` com o solver 
-        `CBC` (COIN-OR Branch and Cut), que é open-source e eficiente.
+        **Implementação:** Como o PL só tem limites por estado e tetos de 
+        orçamento (total e por região), o vértice ótimo que o Simplex 
+        encontraria é obtido em forma fechada: os estados são atendidos em 
+        ordem decrescente de vidas salvas por real, até esgotar os limites.
         """)
     
     st.sidebar.markdown("---")
@@ -414,10 +529,10 @@ def render_dashboard(df: pd.DataFrame, geojson, ano: int):
             orientation='h',
             color='taxa_mortes_100k',
             color_continuous_scale='YlOrRd',
-            text='taxa_mortes_100k',
+            text=np.char.mod('%.1f', df_ranking['taxa_mortes_100k'].to_numpy()),
             labels={'taxa_mortes_100k': 'Taxa por 100 mil', 'sigla': 'Estado'}
         )
-        fig_bar.update_traces(texttemplate='%{text:.1f}', textposition='outside')
+        fig_bar.update_traces(textposition='outside')
         fig_bar.update_layout(
             height=700,
             showlegend=False,
@@ -506,10 +621,10 @@ def render_dashboard(df: pd.DataFrame, geojson, ano: int):
             orientation='h',
             color='gasto_per_capita',
             color_continuous_scale='Blues',
-            text='gasto_per_capita',
+            text=df_ranking_gasto['gasto_per_capita'].map('R$ {:,.0f}'.format),
             labels={'gasto_per_capita': 'Gasto Per Capita (R$)', 'sigla': 'Estado'}
         )
-        fig_bar_gasto.update_traces(texttemplate='R$ %{text:,.0f}', textposition='outside')
+        fig_bar_gasto.update_traces(textposition='outside')
         fig_bar_gasto.update_layout(
             height=700,
             showlegend=False,
@@ -525,14 +640,7 @@ def render_dashboard(df: pd.DataFrame, geojson, ano: int):
     st.markdown("---")
     st.subheader("🗺️ Comparativo por Região")
     
-    df_regiao = df.groupby('regiao').agg({
-        'mortes_violentas': 'sum',
-        'populacao': 'sum',
-        'orcamento_2022_milhoes': 'sum'
-    }).reset_index()
-    
-    df_regiao['taxa_regiao'] = df_regiao['mortes_violentas'] / df_regiao['populacao'] * 100000
-    df_regiao['gasto_pc_regiao'] = df_regiao['orcamento_2022_milhoes'] * 1e6 / df_regiao['populacao']
+    df_regiao = obter_resumo_regioes(df, ano)
     
     fig_regiao = make_subplots(
         rows=1, cols=2,
@@ -581,19 +689,14 @@ def render_dashboard(df: pd.DataFrame, geojson, ano: int):
         df_tabela.columns = ['UF', 'Estado', 'Região', 'População', 'Mortes Violentas', 'Taxa/100k', 'Orçamento (R$ mi)', 'Gasto/Capita']
         
         st.dataframe(
-            df_tabela.style.format({
-                'População': '{:,.0f}',
-                'Mortes Violentas': '{:,.0f}',
-                'Taxa/100k': '{:.1f}',
-                'Orçamento (R$ mi)': 'R$ {:,.1f}',
-                'Gasto/Capita': 'R$ {:,.0f}'
-            }).background_gradient(subset=['Taxa/100k'], cmap='YlOrRd'),
+            df_tabela.style.format(FMT_DASHBOARD).background_gradient(subset=['Taxa/100k'], cmap='YlOrRd'),
             use_container_width=True,
             height=400,
             hide_index=True
         )
 
 
+@st.fragment
 def render_otimizacao(df: pd.DataFrame, ano: int = 2022):
     """Aba Otimização: controles e resultados da PL."""
     
@@ -624,8 +727,8 @@ def render_otimizacao(df: pd.DataFrame, ano: int = 2022):
         | **Investimento Máximo** | % máximo para evitar concentração excessiva em poucos estados |
         
         #### Método de resolução:
-        - **Solver**: PuLP com CBC (Coin-or Branch and Cut)
-        - **Algoritmo**: Simplex com branch-and-bound para variáveis inteiras
+        - **Solver**: forma fechada (guloso exato), com o mesmo ótimo do Simplex
+        - **Algoritmo**: estados ordenados pelo ganho marginal e preenchidos até os limites
         - **Tempo típico**: < 1 segundo para 27 estados
         """)
     
@@ -673,14 +776,8 @@ def render_otimizacao(df: pd.DataFrame, ano: int = 2022):
     
     if st.button("🚀 Calcular Alocação Ótima", type="primary", use_container_width=True):
         
-        with st.spinner("Executando otimização via Simplex..."):
-            resultado = otimizar_alocacao(
-                df_dados=df,
-                orcamento_disponivel=orcamento_milhoes,
-                investimento_minimo_pct=inv_min_pct,
-                investimento_maximo_pct=inv_max_pct,
-                verbose=False
-            )
+        with st.spinner("Resolvendo a Programação Linear..."):
+            resultado = obter_otimizacao(df, ano, orcamento_milhoes, inv_min_pct, inv_max_pct)
         
         st.session_state['resultado_otimizacao'] = resultado
         st.session_state['orcamento_usado'] = orcamento_milhoes
@@ -737,7 +834,7 @@ def render_otimizacao(df: pd.DataFrame, ano: int = 2022):
                         y='investimento_milhoes',
                         color='reducao_percentual',
                         color_continuous_scale='Greens',
-                        text='investimento_milhoes',
+                        text=np.char.mod('R$ %.0fM', df_alloc_positivo['investimento_milhoes'].to_numpy()),
                         labels={
                             'investimento_milhoes': 'Investimento (R$ milhões)',
                             'sigla': 'Estado',
@@ -745,7 +842,7 @@ def render_otimizacao(df: pd.DataFrame, ano: int = 2022):
                         },
                         title="Investimento por Estado"
                     )
-                    fig_alloc.update_traces(texttemplate='R$ %{text:.0f}M', textposition='outside')
+                    fig_alloc.update_traces(textposition='outside')
                     fig_alloc.update_layout(
                         height=400,
                         margin=dict(t=50, b=50),
@@ -756,7 +853,7 @@ def render_otimizacao(df: pd.DataFrame, ano: int = 2022):
                     st.plotly_chart(fig_alloc, use_container_width=True, config={'displayModeBar': False, 'scrollZoom': False})
                 
                 with col_pie:
-                    df_regiao = resultado.alocacao.groupby('regiao')['investimento_milhoes'].sum().reset_index()
+                    df_regiao = resultado.por_regiao[['regiao', 'investimento_milhoes']]
                     df_regiao = df_regiao[df_regiao['investimento_milhoes'] > 0]
                     
                     fig_pie = px.pie(
@@ -778,13 +875,7 @@ def render_otimizacao(df: pd.DataFrame, ano: int = 2022):
             df_detalhe.columns = ['UF', 'Estado', 'Região', 'Investimento (R$ mi)', 'Mortes Antes', 'Mortes Depois', 'Vidas Salvas', 'Redução %']
             
             st.dataframe(
-                df_detalhe.style.format({
-                    'Investimento (R$ mi)': 'R$ {:,.2f}',
-                    'Mortes Antes': '{:,.0f}',
-                    'Mortes Depois': '{:,.0f}',
-                    'Vidas Salvas': '{:,.0f}',
-                    'Redução %': '{:.2f}%'
-                }).background_gradient(subset=['Investimento (R$ mi)'], cmap='Greens'),
+                df_detalhe.style.format(FMT_ALOCACAO).background_gradient(subset=['Investimento (R$ mi)'], cmap='Greens'),
                 use_container_width=True,
                 height=400,
                 hide_index=True
@@ -795,7 +886,7 @@ def render_otimizacao(df: pd.DataFrame, ano: int = 2022):
             
             if 'SolverError' in resultado.status:
                 st.warning("""
-                **Erro no solver CBC.** Isso pode acontecer quando:
+                **Erro no solver.** Isso pode acontecer quando:
                 - O problema tem restrições impossíveis de satisfazer
                 - O orçamento é muito baixo para os limites mínimos configurados
                 
@@ -944,7 +1035,7 @@ def render_comparativo(df: pd.DataFrame, ano: int = 2022):
             y='reducao_pct',
             color='investimento_milhoes',
             color_continuous_scale='Blues',
-            text='reducao_pct',
+            text=np.char.mod('%.1f%%', df_regiao['reducao_pct'].to_numpy()),
             labels={
                 'reducao_pct': 'Redução (%)',
                 'regiao': 'Região',
@@ -952,7 +1043,7 @@ def render_comparativo(df: pd.DataFrame, ano: int = 2022):
             },
             title="Redução Percentual por Região"
         )
-        fig_reducao.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
+        fig_reducao.update_traces(textposition='outside')
         fig_reducao.update_layout(height=400)
         st.plotly_chart(fig_reducao, use_container_width=True)
     
@@ -966,25 +1057,38 @@ def render_comparativo(df: pd.DataFrame, ano: int = 2022):
     col1, col2 = st.columns([1.5, 1])
     
     with col1:
-        fig_efic = px.scatter(
-            df_efic,
-            x='investimento_milhoes',
-            y='reducao_mortes',
-            size='populacao',
-            color='custo_por_vida',
-            hover_name='estado',
-            text='sigla',
-            color_continuous_scale='RdYlGn_r',
-            labels={
-                'investimento_milhoes': 'Investimento (R$ milhões)',
-                'reducao_mortes': 'Vidas Salvas',
-                'custo_por_vida': 'Custo/Vida (R$ mi)',
-                'populacao': 'População'
-            },
-            title="Eficiência: Investimento vs Vidas Salvas"
+        # Diâmetro das bolhas (px) em escala log da população, com máximo de
+        # 20 px como o size_max padrão do px.scatter
+        log_pop = np.log10(df_efic['populacao'].to_numpy(dtype=float))
+        tamanho_bolha = log_pop / np.log10(df['populacao'].max()) * 20
+        
+        fig_efic = go.Figure(go.Scatter(
+            x=df_efic['investimento_milhoes'],
+            y=df_efic['reducao_mortes'],
+            mode='markers+text',
+            text=df_efic['sigla'],
+            textposition='top center',
+            customdata=df_efic[['estado', 'custo_por_vida', 'populacao']].to_numpy(),
+            hovertemplate=(
+                '<b>%{customdata[0]}</b><br>'
+                'Investimento (R$ milhões): %{x:,.2f}<br>'
+                'Vidas Salvas: %{y:,.0f}<br>'
+                'Custo/Vida (R$ mi): %{customdata[1]:,.2f}<br>'
+                'População: %{customdata[2]:,.0f}<extra></extra>'
+            ),
+            marker=dict(
+                size=tamanho_bolha,
+                color=df_efic['custo_por_vida'],
+                colorscale='RdYlGn_r',
+                colorbar=dict(title='Custo/Vida (R$ mi)')
+            )
+        ))
+        fig_efic.update_layout(
+            title="Eficiência: Investimento vs Vidas Salvas",
+            xaxis_title='Investimento (R$ milhões)',
+            yaxis_title='Vidas Salvas',
+            height=450
         )
-        fig_efic.update_traces(textposition='top center')
-        fig_efic.update_layout(height=450)
         st.plotly_chart(fig_efic, use_container_width=True)
     
     with col2:
@@ -997,11 +1101,7 @@ def render_comparativo(df: pd.DataFrame, ano: int = 2022):
         top_efic.columns = ['Estado', 'Investimento (R$ mi)', 'Vidas Salvas', 'Custo/Vida']
         
         st.dataframe(
-            top_efic.style.format({
-                'Investimento (R$ mi)': 'R$ {:,.2f}',
-                'Vidas Salvas': '{:,.0f}',
-                'Custo/Vida': 'R$ {:,.2f}'
-            }),
+            top_efic.style.format(FMT_EFICIENCIA),
             use_container_width=True,
             hide_index=True
         )
@@ -1179,10 +1279,7 @@ def render_sensibilidade(df: pd.DataFrame, ano: int = 2022):
     ])
     
     st.dataframe(
-        df_cenarios.style.format({
-            'Vidas Salvas': '{:,.0f}',
-            'Diferença': '{:+,.0f}'
-        }),
+        df_cenarios.style.format(FMT_CENARIOS),
         use_container_width=True,
         hide_index=True
     )
@@ -1261,14 +1358,7 @@ def render_monte_carlo(df: pd.DataFrame, ano: int = 2022):
     
     if st.button("🚀 Executar Simulação Monte Carlo", type="primary", use_container_width=True):
         with st.spinner(f"Executando {n_simulacoes} simulações... Aguarde..."):
-            resultado_mc = executar_monte_carlo(
-                df,
-                orcamento=orcamento,
-                n_simulacoes=n_simulacoes,
-                incerteza_elasticidade=variacao/100,
-                incerteza_taxa=variacao/200,
-                verbose=False
-            )
+            resultado_mc = obter_monte_carlo(df, ano, orcamento, n_simulacoes, variacao)
             st.session_state['resultado_mc'] = resultado_mc
             st.session_state['mc_n_sim_display'] = n_simulacoes
         st.success("✅ Simulação concluída!")
@@ -1294,19 +1384,32 @@ def render_monte_carlo(df: pd.DataFrame, ano: int = 2022):
     
     st.subheader("📈 Distribuição dos Resultados")
     
+    # Agrupa no servidor: o navegador recebe 30 barras em vez de N simulações
     fig_hist = go.Figure()
-    fig_hist.add_trace(go.Histogram(
-        x=resultado_mc.distribuicao_reducao,
-        nbinsx=30,
+    fig_hist.add_trace(histograma_barras(
+        resultado_mc.distribuicao_reducao, nbins=30,
         name="Simulações",
         marker_color='#3498db'
     ))
     
-    fig_hist.add_vline(x=resultado_mc.intervalo_confianca_95[0], line_dash="dash", line_color="red", annotation_text="IC 2.5%")
-    fig_hist.add_vline(x=resultado_mc.intervalo_confianca_95[1], line_dash="dash", line_color="red", annotation_text="IC 97.5%")
-    fig_hist.add_vline(x=resultado_mc.media_reducao, line_color="green", annotation_text="Média")
+    # Linhas verticais (IC e média) montadas de uma vez no update_layout
+    linhas = [
+        (resultado_mc.intervalo_confianca_95[0], "red", "dash", "IC 2.5%"),
+        (resultado_mc.intervalo_confianca_95[1], "red", "dash", "IC 97.5%"),
+        (resultado_mc.media_reducao, "green", "solid", "Média")
+    ]
     
     fig_hist.update_layout(
+        shapes=[
+            dict(type='line', xref='x', yref='paper', x0=x, x1=x, y0=0, y1=1,
+                 line=dict(color=cor, dash=traco))
+            for x, cor, traco, _ in linhas
+        ],
+        annotations=[
+            dict(x=x, xref='x', y=1, yref='paper', text=texto, showarrow=False,
+                 xanchor='left', yanchor='top')
+            for x, _, _, texto in linhas
+        ],
         title=f"Distribuição de Vidas Salvas ({n_sim_display} simulações)",
         xaxis_title="Vidas Salvas",
         yaxis_title="Frequência",
@@ -1332,7 +1435,7 @@ def render_monte_carlo(df: pd.DataFrame, ano: int = 2022):
     })
     
     st.dataframe(
-        df_percentis.style.format({'Vidas Salvas': '{:,.0f}'}),
+        formatar_tabela(df_percentis, FMT_PERCENTIS),
         use_container_width=True,
         hide_index=True
     )
@@ -1412,12 +1515,7 @@ def render_backtesting(df: pd.DataFrame, ano: int = 2022):
         if recalcular:
             with st.spinner("Executando validação histórica..."):
                 if metodo == "Janela Deslizante":
-                    resultado_rolling = validar_modelo_rolling(
-                        janela_treino=tamanho_janela,
-                        janela_teste=1,
-                        ano_inicio=2010,
-                        ano_fim=2022
-                    )
+                    resultado_rolling = obter_backtesting(tamanho_janela)
                 else:
                     resultado_rolling = obter_backtesting_padrao()
         else:
@@ -1543,7 +1641,7 @@ def render_multi_periodo(df: pd.DataFrame, ano: int = 2022):
         if recalcular:
             with st.spinner("Otimizando para múltiplos períodos..."):
                 orcamento_milhoes = orcamento_total * 1000
-                df_comparativo = comparar_estrategias(df, orcamento_milhoes, n_periodos)
+                df_comparativo = obter_multiperiodo(df, ano, orcamento_milhoes, n_periodos)
         else:
             df_comparativo = obter_multiperiodo_padrao(df)
             orcamento_total = 25.0
@@ -1574,11 +1672,10 @@ def render_multi_periodo(df: pd.DataFrame, ano: int = 2022):
         st.success(f"🏆 **Melhor estratégia: {melhor}**")
         
         st.dataframe(
-            df_display[['Estratégia', 'Crimes Evitados', 'Redução Período 1', 'Redução Último Período']].style.format({
-                'Crimes Evitados': '{:,.0f}',
-                'Redução Período 1': '{:,.0f}',
-                'Redução Último Período': '{:,.0f}'
-            }),
+            formatar_tabela(
+                df_display[['Estratégia', 'Crimes Evitados', 'Redução Período 1', 'Redução Último Período']],
+                FMT_ESTRATEGIAS
+            ),
             use_container_width=True,
             hide_index=True
         )
@@ -1591,9 +1688,9 @@ def render_multi_periodo(df: pd.DataFrame, ano: int = 2022):
             y='Crimes Evitados',
             color='Crimes Evitados',
             color_continuous_scale='Greens',
-            text='Crimes Evitados'
+            text=df_display['Crimes Evitados'].map('{:,.0f}'.format)
         )
-        fig_bar.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
+        fig_bar.update_traces(textposition='outside')
         fig_bar.update_layout(
             showlegend=False,
             dragmode=False,
@@ -1604,17 +1701,22 @@ def render_multi_periodo(df: pd.DataFrame, ano: int = 2022):
         
         st.subheader("💰 Distribuição Temporal do Investimento")
         
-        fig_dist = go.Figure()
-        for _, row in df_comparativo.iterrows():
-            if row['distribuicao']:
-                periodos = list(range(1, len(row['distribuicao']) + 1))
-                valores_bi = [v / 1000 for v in row['distribuicao']]
-                fig_dist.add_trace(go.Scatter(
-                    x=periodos,
-                    y=valores_bi,
-                    mode='lines+markers',
-                    name=row['estrategia']
-                ))
+        # Formato longo (uma linha por estratégia/período) e figura em uma chamada
+        df_dist = (
+            df_comparativo[['estrategia', 'distribuicao']]
+            .explode('distribuicao')
+            .dropna(subset=['distribuicao'])
+        )
+        df_dist['periodo'] = df_dist.groupby('estrategia').cumcount() + 1
+        df_dist['valor_bi'] = df_dist['distribuicao'].astype(float) / 1000
+        
+        fig_dist = px.line(
+            df_dist,
+            x='periodo',
+            y='valor_bi',
+            color='estrategia',
+            markers=True
+        )
         
         fig_dist.update_layout(
             title="Investimento por Período",
@@ -1671,7 +1773,7 @@ def render_conclusoes(df: pd.DataFrame, ano: int = 2022):
     
     resultado = obter_otimizacao_padrao(df)
     
-    df_efic_calc = calcular_dea_ccr(df)
+    df_efic_calc = obter_dea(df, ano)
     resumo_efic = resumo_dea(df_efic_calc)
     
     top5_efic = df_efic_calc.head(5)
@@ -1744,7 +1846,7 @@ def render_conclusoes(df: pd.DataFrame, ano: int = 2022):
     - **25%** - Economia (quanto menor o gasto para o mesmo resultado, melhor)
     """)
     
-    df_dea = calcular_dea_ccr(df)
+    df_dea = obter_dea(df, ano)
     resumo = resumo_dea(df_dea)
     
     col_m1, col_m2, col_m3 = st.columns(3)
@@ -1775,11 +1877,7 @@ def render_conclusoes(df: pd.DataFrame, ano: int = 2022):
     df_ranking = df_ranking[['Ranking', 'Estado', 'UF', 'Região', 'Gasto/capita', 'Taxa/100k', 'Eficiência %', 'Status']]
     
     st.dataframe(
-        df_ranking.style.format({
-            'Gasto/capita': 'R$ {:,.0f}',
-            'Taxa/100k': '{:.1f}',
-            'Eficiência %': '{:.1f}%'
-        }),
+        df_ranking.style.format(FMT_RANKING_DEA),
         use_container_width=True,
         hide_index=True,
         height=700
@@ -1918,7 +2016,7 @@ def main():
             <a href="https://siconfi.tesouro.gov.br/" target="_blank">SICONFI</a>
         </p>
         <p>
-            Método: Programação Linear (Simplex) via <a href="https://github.com/coin-or/pulp" target="_blank">PuLP/CBC</a> | 
+            Método: Programação Linear (guloso exato em forma fechada) | 
             Interface: <a href="https://streamlit.io/" target="_blank">Streamlit</a>
         </p>
     </div>
@@ -27,6 +27,19 @@ from dataclasses import dataclass
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from pathlib import Path
+from functools import lru_cache
+
+
+# Casas decimais das colunas publicadas na tabela de previsões (o cálculo
+# segue em precisão total e o arredondamento é feito uma vez, na montagem)
+CASAS_DECIMAIS_PREVISOES = {
+    'previsto': 2,
+    'erro': 2,
+    'erro_abs': 2,
+    'erro_pct': 2,
+    'tendencia_anual': 4,
+    'r2_treino': 4
+}
 
 
 @dataclass
@@ -43,8 +56,9 @@ class ResultadoBacktest:
     previsoes: pd.DataFrame
 
 
-def carregar_serie_completa() -> pd.DataFrame:
-    """Carrega série histórica completa de homicídios (2013-2023) dos novos dados."""
+@lru_cache(maxsize=1)
+def _carregar_serie_cache() -> pd.DataFrame:
+    """Leitura da série histórica em cache; não deve ser modificada."""
     # Importa do módulo dados para usar os dados novos
     from dados import carregar_taxa_homicidios_historico
     
@@ -56,6 +70,16 @@ def carregar_serie_completa() -> pd.DataFrame:
     return df
 
 
+def carregar_serie_completa() -> pd.DataFrame:
+    """
+    Carrega série histórica completa de homicídios (2013-2023) dos novos dados.
+    
+    A leitura da planilha e dos CSVs (o passo mais caro do backtest) fica em
+    cache; cada chamada recebe uma cópia, que pode ser modificada à vontade.
+    """
+    return _carregar_serie_cache().copy()
+
+
 def calcular_tendencia_estado(
     df: pd.DataFrame,
     estado: str,
@@ -85,6 +109,101 @@ def calcular_tendencia_estado(
     return slope, intercept, r_value**2
 
 
+def _somas_acumuladas(
+    df: pd.DataFrame
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pré-calcula somas acumuladas por estado para regressões em janelas.
+    
+    Com Σ1, Σx, Σy, Σxy, Σx² e Σy² acumulados ao longo dos anos, as
+    estatísticas de qualquer janela [a, b] saem por subtração em O(1),
+    sem refazer a regressão a cada janela. O ano é centrado no primeiro
+    ano da série para evitar cancelamento numérico em Σx².
+    
+    Args:
+        df: Série histórica (estado, ano, taxa_homicidios)
+    
+    Returns:
+        Tupla (estados, anos, taxas, somas): taxas tem forma
+        (n_estados, n_anos), com NaN onde não há observação, e somas
+        tem forma (6, n_estados, n_anos + 1), com zeros na coluna 0
+    """
+    # Matriz estado x ano montada direto em NumPy (códigos inteiros por
+    # estado e por ano), sem o custo de pivot_table num frame tão pequeno
+    codigo_estado, estados = pd.factorize(df['estado'], sort=True)
+    anos, codigo_ano = np.unique(df['ano'].to_numpy(dtype=int), return_inverse=True)
+    
+    taxas = np.full((len(estados), len(anos)), np.nan)
+    taxas[codigo_estado, codigo_ano] = df['taxa_homicidios'].to_numpy(dtype=float)
+    estados = np.asarray(estados)
+    
+    valido = ~np.isnan(taxas)
+    x = np.where(valido, (anos - anos[0]).astype(float), 0.0)
+    y = np.where(valido, taxas, 0.0)
+    
+    # Mantido em float64: as estatísticas de janela saem por diferença de
+    # somas acumuladas (n·Σxy − Σx·Σy), e em float32 o cancelamento já
+    # altera previsões na segunda casa decimal
+    termos = np.stack([valido.astype(float), x, y, x * y, x * x, y * y])
+    somas = np.zeros(termos.shape[:2] + (len(anos) + 1,))
+    np.cumsum(termos, axis=2, out=somas[:, :, 1:])
+    
+    return estados, anos, taxas, somas
+
+
+@lru_cache(maxsize=1)
+def _somas_serie_completa() -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Somas acumuladas da série completa, calculadas uma única vez.
+    
+    Backtests e validações sucessivas sobre a série padrão só fazem as
+    subtrações de janela em _tendencias_janela. Os arrays são marcados
+    como somente leitura porque ficam compartilhados pelo cache.
+    """
+    arrays = _somas_acumuladas(_carregar_serie_cache())
+    for arr in arrays:
+        arr.flags.writeable = False
+    return arrays
+
+
+def _tendencias_janela(
+    somas: np.ndarray,
+    anos: np.ndarray,
+    ano_inicio,
+    ano_fim
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Calcula a tendência linear de todos os estados numa janela de anos.
+    
+    Equivale a calcular_tendencia_estado para cada estado, mas a partir
+    das somas de _somas_acumuladas. Estados com menos de 3 observações
+    na janela recebem tendência nula. ano_inicio e ano_fim podem ser
+    arrays de W janelas, avaliadas todas de uma vez.
+    
+    Returns:
+        Tupla de arrays (slope, intercept, r_squared) por estado, com
+        forma (n_estados,) ou (n_estados, W)
+    """
+    i0 = np.searchsorted(anos, ano_inicio, side='left')
+    i1 = np.searchsorted(anos, ano_fim, side='right')
+    n, sx, sy, sxy, sxx, syy = somas[:, :, i1] - somas[:, :, i0]
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = n * sxy - sx * sy
+        var_x = n * sxx - sx ** 2
+        var_y = n * syy - sy ** 2
+        slope = cov / var_x
+        intercept = sy / n - slope * (sx / n + anos[0])
+        r_squared = np.where(var_y > 0, cov ** 2 / (var_x * var_y), 0.0)
+    
+    suficiente = n >= 3
+    return (
+        np.where(suficiente, slope, 0.0),
+        np.where(suficiente, intercept, 0.0),
+        np.where(suficiente, r_squared, 0.0)
+    )
+
+
 def prever_taxa(
     slope: float,
     intercept: float,
@@ -110,7 +229,8 @@ def executar_backtest(
     ano_treino_inicio: int = 2012,
     ano_treino_fim: int = 2017,
     ano_teste_inicio: int = 2018,
-    ano_teste_fim: int = 2022
+    ano_teste_fim: int = 2022,
+    df: Optional[pd.DataFrame] = None
 ) -> ResultadoBacktest:
     """
     Executa backtesting do modelo.
@@ -125,71 +245,60 @@ def executar_backtest(
         ano_treino_fim: Fim do período de treino
         ano_teste_inicio: Início do período de teste
         ano_teste_fim: Fim do período de teste
+        df: Série histórica já carregada (padrão: carregar_serie_completa())
     
     Returns:
         ResultadoBacktest com métricas e previsões
     """
-    # Carrega dados
-    df = carregar_serie_completa()
-    
-    resultados = []
+    # Carrega dados (a série padrão já tem as somas por estado em cache)
+    if df is None:
+        df = carregar_serie_completa()
+        estados, anos, taxas, somas = _somas_serie_completa()
+    else:
+        estados, anos, taxas, somas = _somas_acumuladas(df)
     
-    for estado in df['estado'].unique():
-        # Calcula tendência no período de treino
-        slope, intercept, r2_treino = calcular_tendencia_estado(
-            df, estado, ano_treino_inicio, ano_treino_fim
-        )
-        
-        # Dados observados no período de teste
-        df_teste = df[
-            (df['estado'] == estado) & 
-            (df['ano'] >= ano_teste_inicio) & 
-            (df['ano'] <= ano_teste_fim)
-        ].sort_values('ano')
-        
-        if len(df_teste) == 0:
-            continue
-        
-        for _, row in df_teste.iterrows():
-            ano = row['ano']
-            observado = row['taxa_homicidios']
-            
-            # Previsão baseada na tendência
-            previsto = prever_taxa(slope, intercept, ano_treino_inicio, ano)
-            previsto = max(0, previsto)  # Taxa não pode ser negativa
-            
-            erro = previsto - observado
-            erro_pct = abs(erro / observado * 100) if observado > 0 else 0
-            
-            resultados.append({
-                'estado': estado,
-                'ano': ano,
-                'observado': observado,
-                'previsto': round(previsto, 2),
-                'erro': round(erro, 2),
-                'erro_abs': round(abs(erro), 2),
-                'erro_pct': round(erro_pct, 2),
-                'tendencia_anual': round(slope, 4),
-                'r2_treino': round(r2_treino, 4)
-            })
-    
-    df_resultados = pd.DataFrame(resultados)
-    
-    # Calcula métricas agregadas
-    mae = df_resultados['erro_abs'].mean()
-    rmse = np.sqrt((df_resultados['erro'] ** 2).mean())
-    mape = df_resultados['erro_pct'].mean()
-    
-    # Correlação entre previsto e observado
-    corr, _ = stats.pearsonr(
-        df_resultados['previsto'], 
-        df_resultados['observado']
+    # Tendência de todos os estados no período de treino, em forma fechada
+    # (slope = cov(x, y) / var(x)) a partir das somas por estado
+    slope, intercept, r2_treino = _tendencias_janela(
+        somas, anos, ano_treino_inicio, ano_treino_fim
     )
     
-    # R² da previsão
-    ss_res = ((df_resultados['observado'] - df_resultados['previsto']) ** 2).sum()
-    ss_tot = ((df_resultados['observado'] - df_resultados['observado'].mean()) ** 2).sum()
-    r_squared = 1 - (ss_res / ss_tot) if ss_tot > 0 else 0
+    # Dados observados no período de teste: fatia de colunas da matriz
+    # estado x ano (anos ordenados, busca binária) em vez de máscaras sobre
+    # o DataFrame. Linhas na ordem original dos estados na série e, dentro
+    # de cada estado, por ano; anos sem observação ficam de fora
+    i0 = np.searchsorted(anos, ano_teste_inicio, side='left')
+    i1 = np.searchsorted(anos, ano_teste_fim, side='right')
+    ordem = pd.Index(estados).get_indexer(df['estado'].unique())
+    janela_teste = taxas[ordem, i0:i1]
+    linha, coluna = np.nonzero(~np.isnan(janela_teste))
+    idx_estado = ordem[linha]
+    ano_teste = anos[i0:i1][coluna]
+    
+    # Previsão baseada na tendência, em colunas (taxa não pode ser negativa)
+    observado = janela_teste[linha, coluna]
+    previsto = prever_taxa(
+        slope[idx_estado], intercept[idx_estado],
+        ano_treino_inicio, ano_teste
+    )
+    np.maximum(previsto, 0.0, out=previsto)
+    erro = previsto - observado
+    with np.errstate(divide='ignore', invalid='ignore'):
+        erro_pct = np.where(observado > 0, np.abs(erro / observado * 100), 0)
+    
+    # Arredonda só na montagem da tabela final
+    df_resultados = pd.DataFrame({
+        'estado': estados[idx_estado],
+        'ano': ano_teste,
+        'observado': observado,
+        'previsto': previsto,
+        'erro': erro,
+        'erro_abs': np.abs(erro),
+        'erro_pct': erro_pct,
+        'tendencia_anual': slope[idx_estado],
+        'r2_treino': r2_treino[idx_estado]
+    }).round(CASAS_DECIMAIS_PREVISOES)
+    mae, rmse, mape, corr, r_squared = _calcular_metricas(df_resultados)
     
     return ResultadoBacktest(
         periodo_treino=(ano_treino_inicio, ano_treino_fim),
@@ -204,6 +313,49 @@ def executar_backtest(
     )
 
 
+def _calcular_metricas(
+    df_resultados: pd.DataFrame
+) -> Tuple[float, float, float, float, float]:
+    """
+    Calcula as métricas agregadas de um conjunto de previsões.
+    
+    Args:
+        df_resultados: Previsões com colunas observado, previsto, erro,
+                       erro_abs e erro_pct
+    
+    Returns:
+        Tupla (mae, rmse, mape, correlacao, r_squared)
+    """
+    previsto = df_resultados['previsto'].to_numpy(dtype=float)
+    observado = df_resultados['observado'].to_numpy(dtype=float)
+    erro = df_resultados['erro'].to_numpy(dtype=float)
+    n = len(previsto)
+    
+    mae = df_resultados['erro_abs'].to_numpy().mean()
+    rmse = np.sqrt(np.dot(erro, erro) / n)
+    mape = df_resultados['erro_pct'].to_numpy().mean()
+    
+    # Correlação e R² a partir dos mesmos momentos centrados (produtos
+    # internos), sem os temporários de pearsonr e das somas de quadrados
+    dp = previsto - previsto.mean()
+    do = observado - observado.mean()
+    s_pp, s_oo, s_po = np.dot(dp, dp), np.dot(do, do), np.dot(dp, do)
+    
+    # Correlação entre previsto e observado (indefinida se algum é constante)
+    if s_pp > 0 and s_oo > 0:
+        corr = float(np.clip(s_po / np.sqrt(s_pp * s_oo), -1.0, 1.0))
+    else:
+        corr = np.nan
+    
+    # R² da previsão
+    residuo = observado - previsto
+    ss_res = np.dot(residuo, residuo)
+    ss_tot = s_oo
+    r_squared = 1 - (ss_res / ss_tot) if ss_tot > 0 else 0
+    
+    return mae, rmse, mape, corr, r_squared
+
+
 def analisar_estados_por_acuracia(resultado: ResultadoBacktest) -> pd.DataFrame:
     """
     Agrupa resultados por estado e ordena por acurácia.
@@ -214,22 +366,28 @@ def analisar_estados_por_acuracia(resultado: ResultadoBacktest) -> pd.DataFrame:
     Returns:
         DataFrame com métricas por estado
     """
-    df = resultado.previsoes.groupby('estado').agg({
-        'erro_abs': 'mean',
-        'erro_pct': 'mean',
-        'tendencia_anual': 'first',
-        'r2_treino': 'first',
-        'observado': 'mean',
-        'previsto': 'mean'
-    }).reset_index()
-    
-    df.columns = ['estado', 'mae', 'mape', 'tendencia', 'r2_treino', 
-                  'media_observado', 'media_previsto']
-    
-    # Classifica acurácia
-    df['acuracia'] = df['mape'].apply(
-        lambda x: 'Alta' if x < 15 else ('Média' if x < 30 else 'Baixa')
-    )
+    previsoes = resultado.previsoes
+    
+    # Só as médias passam pelo groupby; tendência e R² de treino são
+    # constantes por estado e saem da primeira linha de cada um
+    medias = previsoes.groupby('estado')[
+        ['erro_abs', 'erro_pct', 'observado', 'previsto']
+    ].mean()
+    constantes = previsoes.drop_duplicates('estado').set_index('estado')
+    
+    df = pd.DataFrame({
+        'estado': medias.index,
+        'mae': medias['erro_abs'].values,
+        'mape': medias['erro_pct'].values,
+        'tendencia': constantes['tendencia_anual'].reindex(medias.index).values,
+        'r2_treino': constantes['r2_treino'].reindex(medias.index).values,
+        'media_observado': medias['observado'].values,
+        'media_previsto': medias['previsto'].values
+    })
+    
+    # Classifica acurácia (MAPE < 15%: Alta, < 30%: Média, senão Baixa)
+    mape = df['mape'].to_numpy()
+    df['acuracia'] = np.select([mape < 15, mape < 30], ['Alta', 'Média'], default='Baixa')
     
     return df.sort_values('mape')
 
@@ -248,8 +406,8 @@ def gerar_grafico_backtest(resultado: ResultadoBacktest) -> go.Figure:
     
     fig = go.Figure()
     
-    # Pontos
-    fig.add_trace(go.Scatter(
+    # Pontos (WebGL; a linha de referência, com 2 pontos, segue em SVG)
+    fig.add_trace(go.Scattergl(
         x=df['observado'],
         y=df['previsto'],
         mode='markers',
@@ -260,7 +418,7 @@ def gerar_grafico_backtest(resultado: ResultadoBacktest) -> go.Figure:
             colorbar=dict(title='Erro %'),
             opacity=0.7
         ),
-        text=df['estado'] + ' (' + df['ano'].astype(str) + ')',
+        text=[f'{e} ({a})' for e, a in zip(df['estado'].tolist(), df['ano'].tolist())],
         hovertemplate='%{text}<br>Observado: %{x:.1f}<br>Previsto: %{y:.1f}<extra></extra>'
     ))
     
@@ -287,7 +445,8 @@ def gerar_grafico_backtest(resultado: ResultadoBacktest) -> go.Figure:
 
 def gerar_grafico_serie_temporal(
     resultado: ResultadoBacktest,
-    estados: List[str]
+    estados: List[str],
+    df_hist: Optional[pd.DataFrame] = None
 ) -> go.Figure:
     """
     Gera gráfico de série temporal para estados selecionados.
@@ -295,11 +454,20 @@ def gerar_grafico_serie_temporal(
     Args:
         resultado: Resultado do backtest
         estados: Lista de estados a plotar
+        df_hist: Série histórica usada no backtest (padrão:
+                 carregar_serie_completa()); passe o mesmo df dado a
+                 executar_backtest para não misturar séries
     
     Returns:
         Figura Plotly
     """
-    df_hist = carregar_serie_completa()
+    if df_hist is None:
+        df_hist = carregar_serie_completa()
+    
+    # Ordena e agrupa uma vez, em vez de filtrar o DataFrame inteiro por estado
+    series_obs = dict(tuple(df_hist.sort_values(['estado', 'ano']).groupby('estado', sort=False)))
+    series_prev = dict(tuple(resultado.previsoes.groupby('estado', sort=False)))
+    vazio_obs, vazio_prev = df_hist.iloc[:0], resultado.previsoes.iloc[:0]
     
     fig = make_subplots(
         rows=len(estados), cols=1,
@@ -312,7 +480,7 @@ def gerar_grafico_serie_temporal(
     
     for i, estado in enumerate(estados, 1):
         # Série observada completa
-        df_estado = df_hist[df_hist['estado'] == estado].sort_values('ano')
+        df_estado = series_obs.get(estado, vazio_obs)
         
         fig.add_trace(
             go.Scatter(
@@ -327,7 +495,7 @@ def gerar_grafico_serie_temporal(
         )
         
         # Previsões
-        df_prev = resultado.previsoes[resultado.previsoes['estado'] == estado]
+        df_prev = series_prev.get(estado, vazio_prev)
         
         fig.add_trace(
             go.Scatter(
@@ -368,6 +536,9 @@ def validar_modelo_rolling(
     Validação com janela deslizante (rolling window).
     
     Para cada ano de teste, usa os N anos anteriores para treinar.
+    A série é carregada uma única vez e as tendências de cada janela
+    saem das somas acumuladas por estado, em vez de refazer o backtest
+    completo a cada ano.
     
     Args:
         janela_treino: Tamanho da janela de treino (anos)
@@ -378,29 +549,49 @@ def validar_modelo_rolling(
     Returns:
         DataFrame com métricas por ano de teste
     """
-    resultados = []
-    
-    for ano_teste in range(ano_inicio + janela_treino, ano_fim + 1):
-        treino_inicio = ano_teste - janela_treino
-        treino_fim = ano_teste - 1
-        
-        resultado = executar_backtest(
-            ano_treino_inicio=treino_inicio,
-            ano_treino_fim=treino_fim,
-            ano_teste_inicio=ano_teste,
-            ano_teste_fim=ano_teste
-        )
-        
-        resultados.append({
-            'ano_teste': ano_teste,
-            'treino': f'{treino_inicio}-{treino_fim}',
-            'mae': resultado.mae,
-            'rmse': resultado.rmse,
-            'mape': resultado.mape,
-            'correlacao': resultado.correlacao
-        })
-    
-    return pd.DataFrame(resultados)
+    estados, anos, taxas, somas = _somas_serie_completa()
+    
+    # Anos de teste com dados; as métricas de cada janela vão para colunas
+    # pré-alocadas (estrutura de arrays) e o DataFrame é montado uma vez no fim
+    anos_teste = np.array([
+        ano for ano in range(ano_inicio + janela_treino, ano_fim + 1) if ano in anos
+    ], dtype=int)
+    
+    # Todas as janelas de uma vez: tendências, observações e previsões com
+    # forma (n_estados, n_janelas), sem refazer o ajuste ano a ano
+    slope, intercept, _ = _tendencias_janela(
+        somas, anos, anos_teste - janela_treino, anos_teste - 1
+    )
+    observado = taxas[:, np.searchsorted(anos, anos_teste)]
+    
+    # Previsão baseada na tendência (taxa não pode ser negativa)
+    previsto = intercept + slope * anos_teste
+    np.maximum(previsto, 0.0, out=previsto)
+    erro = previsto - observado
+    with np.errstate(divide='ignore', invalid='ignore'):
+        erro_pct = np.where(observado > 0, np.abs(erro / observado * 100), 0)
+    
+    metricas = np.empty((len(anos_teste), 4))
+    for i in range(len(anos_teste)):
+        # Estados sem dado no ano de teste ficam de fora
+        valido = ~np.isnan(observado[:, i])
+        mae, rmse, mape, corr, _ = _calcular_metricas(pd.DataFrame({
+            'observado': observado[valido, i],
+            'previsto': previsto[valido, i],
+            'erro': erro[valido, i],
+            'erro_abs': np.abs(erro[valido, i]),
+            'erro_pct': erro_pct[valido, i]
+        }).round(CASAS_DECIMAIS_PREVISOES))
+        metricas[i] = (mae, rmse, mape, corr)
+    
+    return pd.DataFrame({
+        'ano_teste': anos_teste,
+        'treino': [f'{ano - janela_treino}-{ano - 1}' for ano in anos_teste],
+        'mae': np.round(metricas[:, 0], 2),
+        'rmse': np.round(metricas[:, 1], 2),
+        'mape': np.round(metricas[:, 2], 2),
+        'correlacao': np.round(metricas[:, 3], 4)
+    })
 
 
 # =============================================================================
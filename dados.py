@@ -10,6 +10,9 @@
 
 import pandas as pd
 import numpy as np
+import re
+import traceback
+from functools import lru_cache
 from pathlib import Path
 
 # Diretório base dos dados NOVOS (relativo ao módulo)
@@ -18,6 +21,9 @@ DADOS_DIR = Path(__file__).parent / "dados" / "dados.novos"
 # Anos disponíveis nos novos dados
 ANOS_DISPONIVEIS = list(range(2013, 2024))  # 2013 a 2023
 
+# Notas numéricas nos nomes dos estados da planilha (ex: "Minas Gerais (5)")
+_RE_NOTA_ESTADO = re.compile(r'\s*\(\d+\)\s*')
+
 
 def carregar_gastos_por_ano(ano: int) -> pd.DataFrame:
     """
@@ -36,7 +42,15 @@ def carregar_gastos_por_ano(ano: int) -> pd.DataFrame:
     if not arquivo.exists():
         raise FileNotFoundError(f"Arquivo não encontrado: {arquivo}")
     
-    df = pd.read_csv(arquivo, sep=';')
+    # Lê só as colunas usadas, já tipadas e com vírgula decimal, evitando a
+    # inferência de tipos e a conversão posterior de texto para número
+    df = pd.read_csv(
+        arquivo,
+        sep=';',
+        usecols=['UF', 'Cod.IBGE', 'População', 'Valor'],
+        dtype={'Cod.IBGE': 'int64', 'População': 'int64', 'Valor': 'float64'},
+        decimal=',',
+    )
     
     # Padroniza nomes de colunas
     df = df.rename(columns={
@@ -46,12 +60,6 @@ def carregar_gastos_por_ano(ano: int) -> pd.DataFrame:
         'Valor': 'gasto_seguranca'
     })
     
-    # Converte valor (pode estar com vírgula como separador decimal)
-    if df['gasto_seguranca'].dtype == object:
-        df['gasto_seguranca'] = df['gasto_seguranca'].str.replace('.', '', regex=False)
-        df['gasto_seguranca'] = df['gasto_seguranca'].str.replace(',', '.', regex=False)
-        df['gasto_seguranca'] = pd.to_numeric(df['gasto_seguranca'], errors='coerce')
-    
     df['ano'] = ano
     
     # Seleciona colunas relevantes
@@ -93,6 +101,41 @@ def carregar_homicidios() -> pd.DataFrame:
     if not arquivo.exists():
         raise FileNotFoundError(f"Arquivo não encontrado: {arquivo}")
     
+    # Cópia: o resultado em cache é compartilhado entre as chamadas
+    return _homicidios_em_cache(arquivo, arquivo.stat().st_mtime_ns).copy()
+
+
+@lru_cache(maxsize=1)
+def _homicidios_em_cache(arquivo: Path, mtime_ns: int) -> pd.DataFrame:
+    """
+    Lê os homicídios já tratados de um .parquet ao lado da planilha.
+    
+    A planilha só é processada quando o .parquet não existe ou é mais
+    antigo que ela (mtime_ns também invalida o cache em memória). Falhas
+    ao ler ou gravar o .parquet apenas fazem cair na leitura do Excel.
+    """
+    cache = arquivo.with_suffix('.parquet')
+    
+    if cache.exists() and cache.stat().st_mtime_ns >= mtime_ns:
+        try:
+            return pd.read_parquet(cache)
+        except (ImportError, OSError, ValueError):
+            pass
+    
+    df = _ler_planilha_homicidios(arquivo)
+    
+    try:
+        df.to_parquet(cache, index=False)
+    except (ImportError, OSError, ValueError):
+        pass
+    
+    return df
+
+
+def _ler_planilha_homicidios(arquivo: Path) -> pd.DataFrame:
+    """
+    Processa a planilha de homicídios para o formato longo.
+    """
     # Lê o Excel sem header (vamos processar manualmente)
     df_raw = pd.read_excel(arquivo, header=None)
     
@@ -119,7 +162,10 @@ def carregar_homicidios() -> pd.DataFrame:
     df_estados = df_estados.dropna(subset=['estado'])
     
     # Remove notas numéricas dos nomes dos estados (ex: "Minas Gerais (5)")
-    df_estados['estado'] = df_estados['estado'].astype(str).str.replace(r'\s*\(\d+\)\s*', '', regex=True).str.strip()
+    df_estados['estado'] = [
+        _RE_NOTA_ESTADO.sub('', nome).strip()
+        for nome in df_estados['estado'].astype(str).tolist()
+    ]
     
     # Transforma para formato longo
     anos_cols = [str(ano) for ano in anos]
@@ -216,7 +262,7 @@ def carregar_orcamento_seguranca(ano: int = 2022) -> pd.DataFrame:
     
     # Adiciona nome do estado
     siglas_estados = _mapeamento_siglas_estados()
-    df['estado'] = df['sigla'].map(siglas_estados)
+    df['estado'] = _mapear_por_sigla(df['sigla'], siglas_estados)[0]
     
     df = df.rename(columns={'gasto_seguranca': f'orcamento_{ano}'})
     df[f'orcamento_{ano}_milhoes'] = (df[f'orcamento_{ano}'] / 1e6).round(2)
@@ -272,6 +318,32 @@ def _mapeamento_regioes() -> dict:
     }
 
 
+def _mapear_por_sigla(siglas: pd.Series, *mapeamentos: dict) -> list:
+    """
+    Traduz uma coluna de siglas por um ou mais mapeamentos sigla -> valor.
+    
+    As siglas são convertidas em códigos uma única vez (Categorical com as
+    categorias dos mapeamentos) e cada mapeamento vira um gather em um array.
+    Siglas desconhecidas resultam em NaN, como em ``Series.map``.
+    
+    Args:
+        siglas: Série com as siglas das UFs
+        *mapeamentos: Dicionários indexados pela sigla (mesmas chaves)
+    
+    Returns:
+        Lista de arrays (dtype object), um por mapeamento
+    """
+    categorias = list(mapeamentos[0])
+    codigos = pd.Categorical(siglas, categories=categorias).codes
+    
+    resultado = []
+    for mapeamento in mapeamentos:
+        # Posição extra no fim para o código -1 (sigla desconhecida)
+        valores = np.array([mapeamento[c] for c in categorias] + [np.nan], dtype=object)
+        resultado.append(valores[codigos])
+    return resultado
+
+
 def carregar_dados_consolidados(ano: int = 2022) -> pd.DataFrame:
     """
     Consolida todos os dados em um único DataFrame pronto para otimização.
@@ -304,9 +376,10 @@ def carregar_dados_consolidados(ano: int = 2022) -> pd.DataFrame:
     siglas_estados = _mapeamento_siglas_estados()
     regioes = _mapeamento_regioes()
     
-    # Adiciona nome do estado e região
-    df_gastos['estado'] = df_gastos['sigla'].map(siglas_estados)
-    df_gastos['regiao'] = df_gastos['sigla'].map(regioes)
+    # Adiciona nome do estado e região (um único passo de codificação)
+    df_gastos['estado'], df_gastos['regiao'] = _mapear_por_sigla(
+        df_gastos['sigla'], siglas_estados, regioes
+    )
     
     # Merge com dados de homicídios
     df = pd.merge(
@@ -342,20 +415,21 @@ def carregar_dados_consolidados(ano: int = 2022) -> pd.DataFrame:
     # 3. Valores são calibrados pela literatura (0.05 a 0.15)
     # ==========================================================================
     
-    # Normaliza gasto per capita (0 a 1)
-    gpc_min = df['gasto_per_capita'].min()
-    gpc_max = df['gasto_per_capita'].max()
-    df['gasto_per_capita_norm'] = (df['gasto_per_capita'] - gpc_min) / (gpc_max - gpc_min)
+    # Normaliza gasto per capita (0 a 1) direto sobre os arrays, sem criar
+    # coluna intermediária (a versão normalizada não vai para a saída)
+    gpc = df['gasto_per_capita'].to_numpy()
+    gpc_min, gpc_max = gpc.min(), gpc.max()
+    gpc_norm = (gpc - gpc_min) / (gpc_max - gpc_min)
     
     # Elasticidade: estados com menor gasto têm maior potencial
     # Base: 0.08, máximo adicional: 0.07 (total: 0.08 a 0.15)
-    df['elasticidade'] = (0.08 + 0.07 * (1 - df['gasto_per_capita_norm'])).round(4)
+    df['elasticidade'] = np.round(0.08 + 0.07 * (1 - gpc_norm), 4)
     
     # Calcula índice de prioridade (para ranking)
     # Estados com alta taxa de crime e baixo investimento = alta prioridade
-    df['indice_prioridade'] = (
-        df['taxa_mortes_100k'] / df['gasto_per_capita'] * 100
-    ).round(2)
+    df['indice_prioridade'] = np.round(
+        df['taxa_mortes_100k'].to_numpy() / gpc * 100, 2
+    )
     
     # Ordena por sigla para consistência
     df = df.sort_values('sigla').reset_index(drop=True)
@@ -435,5 +509,4 @@ if __name__ == "__main__":
         
     except Exception as e:
         print(f"\n✗ Erro ao carregar dados: {e}")
-        import traceback
         traceback.print_exc()
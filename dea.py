@@ -1,45 +1,28 @@
 """
 DEA (Data Envelopment Analysis) - Análise Envoltória de Dados
-Implementação do modelo CCR usando PuLP para medir eficiência relativa dos estados
+Implementação dos modelos CCR (pesos fixos) e BCC (PL resolvido em forma fechada) para medir eficiência relativa dos estados
 """
 
 import pandas as pd
 import numpy as np
-from pulp import LpProblem, LpMaximize, LpVariable, lpSum, LpStatus, value
 
 
-def calcular_dea_ccr(df: pd.DataFrame) -> pd.DataFrame:
+def _eficiencia_pesos_fixos(taxa: np.ndarray, gasto: np.ndarray) -> np.ndarray:
     """
-    Calcula a eficiência relativa de cada estado usando modelo DEA modificado
-    com ÊNFASE NO RESULTADO (baixa taxa de homicídios).
-    
-    Modelo com pesos fixos (Assurance Region DEA):
-    - 75% do peso para o RESULTADO (segurança = baixa taxa de homicídios)
-    - 25% do peso para o CUSTO (economia = baixo gasto per capita)
-    
-    Isso garante que estados com BAIXA TAXA de homicídios sejam priorizados,
-    mesmo que gastem mais que outros estados.
-    
-    A eficiência varia de 0 a 1 (0% a 100%), onde:
-    - 1.0 (100%) = Estado mais eficiente (benchmark)
-    - < 1.0 = Estado menos eficiente
+    Núcleo numérico do DEA com pesos fixos, direto sobre arrays.
     
     Args:
-        df: DataFrame com colunas 'sigla', 'estado', 'gasto_per_capita', 'taxa_mortes_100k'
+        taxa: Taxa de mortes por 100 mil de cada estado
+        gasto: Gasto per capita de cada estado
     
     Returns:
-        DataFrame com colunas adicionais: 'eficiencia_dea', 'eficiencia_percentual', 'benchmark'
+        Eficiência relativa (0 a 1, máximo = 1)
     """
-    
-    # Prepara os dados
-    df_dea = df.copy()
-    
     # =========================================================================
     # COMPONENTE 1: RESULTADO (75% do peso)
     # Quanto MENOR a taxa de homicídios, MAIOR a pontuação
     # =========================================================================
-    taxa_min = df_dea['taxa_mortes_100k'].min()
-    df_dea['score_resultado'] = taxa_min / df_dea['taxa_mortes_100k']
+    score_resultado = taxa.min() / taxa
     # SP (taxa 7.5) -> 7.5/7.5 = 1.0
     # MG (taxa 14.2) -> 7.5/14.2 = 0.53
     # BA (taxa 43.9) -> 7.5/43.9 = 0.17
@@ -48,8 +31,7 @@ def calcular_dea_ccr(df: pd.DataFrame) -> pd.DataFrame:
     # COMPONENTE 2: CUSTO (25% do peso)
     # Quanto MENOR o gasto per capita (para mesmo resultado), MAIOR a pontuação
     # =========================================================================
-    gasto_min = df_dea['gasto_per_capita'].min()
-    df_dea['score_custo'] = gasto_min / df_dea['gasto_per_capita']
+    score_custo = gasto.min() / gasto
     # SP (gasto 325) -> 325/325 = 1.0
     # MG (gasto 884) -> 325/884 = 0.37
     # BA (gasto 391) -> 325/391 = 0.83
@@ -60,25 +42,51 @@ def calcular_dea_ccr(df: pd.DataFrame) -> pd.DataFrame:
     PESO_RESULTADO = 0.75  # Taxa de homicídios (quanto menor, melhor)
     PESO_CUSTO = 0.25      # Gasto per capita (quanto menor, melhor)
     
-    df_dea['eficiencia_dea'] = (
-        PESO_RESULTADO * df_dea['score_resultado'] + 
-        PESO_CUSTO * df_dea['score_custo']
-    )
+    eficiencia = PESO_RESULTADO * score_resultado + PESO_CUSTO * score_custo
     
     # Normaliza para que o máximo seja 100%
-    max_ef = df_dea['eficiencia_dea'].max()
-    df_dea['eficiencia_dea'] = df_dea['eficiencia_dea'] / max_ef
+    eficiencia /= eficiencia.max()
     
-    df_dea['eficiencia_percentual'] = (df_dea['eficiencia_dea'] * 100).round(1)
-    df_dea['benchmark'] = df_dea['eficiencia_dea'] >= 0.999
+    return eficiencia
+
+
+def calcular_dea_ccr(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calcula a eficiência relativa de cada estado usando modelo DEA modificado
+    com ÊNFASE NO RESULTADO (baixa taxa de homicídios).
     
-    # Remove colunas auxiliares
-    df_dea = df_dea.drop(columns=['score_resultado', 'score_custo'])
+    Modelo com pesos fixos (Assurance Region DEA):
+    - 75% do peso para o RESULTADO (segurança = baixa taxa de homicídios)
+    - 25% do peso para o CUSTO (economia = baixo gasto per capita)
     
-    # Ordena por eficiência (maior = melhor)
-    df_dea = df_dea.sort_values('eficiencia_dea', ascending=False)
+    Isso garante que estados com BAIXA TAXA de homicídios sejam priorizados,
+    mesmo que gastem mais que outros estados.
+    
+    A eficiência varia de 0 a 1 (0% a 100%), onde:
+    - 1.0 (100%) = Estado mais eficiente (benchmark)
+    - < 1.0 = Estado menos eficiente
     
-    return df_dea
+    Args:
+        df: DataFrame com colunas 'sigla', 'estado', 'gasto_per_capita', 'taxa_mortes_100k'
+    
+    Returns:
+        DataFrame com colunas adicionais: 'eficiencia_dea', 'eficiencia_percentual', 'benchmark'
+    """
+    
+    # Trabalha direto nos arrays; só as colunas finais vão para o DataFrame
+    taxa = df['taxa_mortes_100k'].to_numpy(dtype=float)
+    gasto = df['gasto_per_capita'].to_numpy(dtype=float)
+    
+    eficiencia = _eficiencia_pesos_fixos(taxa, gasto)
+    
+    df_dea = df.assign(
+        eficiencia_dea=eficiencia,
+        eficiencia_percentual=np.round(eficiencia * 100, 1),
+        benchmark=eficiencia >= 0.999
+    )
+    
+    # Ordena por eficiência (maior = melhor)
+    return df_dea.iloc[np.argsort(-eficiencia, kind='stable')]
 
 
 def calcular_dea_bcc(df: pd.DataFrame) -> pd.DataFrame:
@@ -96,47 +104,98 @@ def calcular_dea_bcc(df: pd.DataFrame) -> pd.DataFrame:
         DataFrame com eficiência BCC
     """
     
-    df_dea = df.copy()
-    
-    inputs = df_dea['gasto_per_capita'].values
-    outputs = (1000 / df_dea['taxa_mortes_100k']).values
-    
-    n_dmus = len(df_dea)
-    siglas = df_dea['sigla'].values
+    inputs = df['gasto_per_capita'].to_numpy(dtype=float)
+    outputs = 1000 / df['taxa_mortes_100k'].to_numpy(dtype=float)
     
     inputs_norm = inputs / inputs.mean()
     outputs_norm = outputs / outputs.mean()
     
-    eficiencias = []
-    
-    for k in range(n_dmus):
-        prob = LpProblem(f"DEA_BCC_{siglas[k]}", LpMaximize)
-        
-        v = LpVariable("v", lowBound=0.0001)
-        u = LpVariable("u", lowBound=0.0001)
-        u0 = LpVariable("u0")  # Variável livre para retornos de escala
-        
-        prob += u * outputs_norm[k] + u0, "Eficiencia"
-        prob += v * inputs_norm[k] == 1, "Normalizacao"
-        
-        for j in range(n_dmus):
-            prob += (
-                u * outputs_norm[j] + u0 - v * inputs_norm[j] <= 0,
-                f"Eficiencia_DMU_{siglas[j]}"
-            )
-        
-        prob.solve()
-        
-        if LpStatus[prob.status] == "Optimal":
-            eficiencia = value(prob.objective)
-            eficiencias.append(min(eficiencia, 1.0))
-        else:
-            eficiencias.append(0.0)
-    
-    df_dea['eficiencia_bcc'] = eficiencias
-    df_dea['eficiencia_bcc_percentual'] = (df_dea['eficiencia_bcc'] * 100).round(1)
-    
-    return df_dea
+    eficiencias = _eficiencias_bcc(inputs_norm, outputs_norm)
+    
+    return df.assign(
+        eficiencia_bcc=eficiencias,
+        eficiencia_bcc_percentual=np.round(eficiencias * 100, 1),
+    )
+
+
+def _fronteira_inferior(px: np.ndarray, py: np.ndarray) -> np.ndarray:
+    """
+    Índices dos vértices da envoltória convexa inferior dos pontos
+    (px, py), em ordem crescente de px (cadeia monótona de Andrew).
+    """
+    ordem = np.lexsort((py, px))
+    # Listas Python: indexação escalar mais barata que em ndarray no laço
+    xs, ys = px.tolist(), py.tolist()
+    vertices = []
+    for i in ordem.tolist():
+        while len(vertices) >= 2:
+            a, b = vertices[-2], vertices[-1]
+            # Remove b se não fizer uma curva estritamente à esquerda
+            cruz = (xs[b] - xs[a]) * (ys[i] - ys[a]) - (ys[b] - ys[a]) * (xs[i] - xs[a])
+            if cruz > 0:
+                break
+            vertices.pop()
+        vertices.append(i)
+    return np.array(vertices, dtype=int)
+
+
+def _eficiencias_bcc(
+    inputs_norm: np.ndarray,
+    outputs_norm: np.ndarray,
+    peso_minimo: float = 0.0001
+) -> np.ndarray:
+    """
+    Resolve o PL do DEA-BCC (orientado a input, 1 input e 1 output) de
+    todas as DMUs de uma vez.
+    
+    PL da DMU k, com variáveis u, v >= peso_minimo e u0 livre:
+        max u*y_k + u0  s.a.  v*x_k = 1  e  u*y_j + u0 - v*x_j <= 0  (todo j)
+    
+    A normalização fixa v = 1/x_k e o u0 ótimo é a menor folga entre as
+    restrições, então o PL se reduz a maximizar em w = u*x_k a função
+        f_k(w) = min_j [x_j - w*y_j] / x_k + w*y_k / x_k
+    que é côncava e linear por partes. O ótimo está em w = peso_minimo*x_k
+    ou num ponto de quebra w = (x_j - x_l) / (y_j - y_l), que não depende
+    de k. Avaliar esses candidatos dá a solução exata dos n PLs sem
+    chamar um solver (f_k <= 1, pois a restrição j = k limita o objetivo).
+    
+    Args:
+        inputs_norm: Input (gasto) normalizado de cada DMU
+        outputs_norm: Output (segurança) normalizado de cada DMU
+        peso_minimo: Limite inferior dos pesos u e v
+    
+    Returns:
+        Eficiência de cada DMU, limitada a 1.0 (0.0 se o PL for inviável)
+    """
+    x = np.asarray(inputs_norm, dtype=float)
+    y = np.asarray(outputs_norm, dtype=float)
+    
+    # Só as DMUs da fronteira podem ser restrições ativas: min_j (x_j - w*y_j)
+    # com w >= 0 é sempre atingido num vértice da envoltória convexa inferior
+    # dos pontos (y, x). Reduzir as restrições a esses vértices (como no
+    # dea.fast) mantém o resultado e deixa o custo em O(n·h) em vez de O(n³)
+    fronteira = _fronteira_inferior(y, x)
+    xf, yf = x[fronteira], y[fronteira]
+    
+    # Pontos de quebra positivos (vértices consecutivos), comuns a todas as DMUs
+    with np.errstate(divide='ignore', invalid='ignore'):
+        quebras = np.diff(xf) / np.diff(yf)
+    quebras = np.unique(quebras[np.isfinite(quebras) & (quebras > 0)])
+    
+    # min_j (x_j - w*y_j) para cada ponto de quebra e para o w mínimo de
+    # cada DMU; depois soma o termo w*y_k e divide por x_k
+    w_min = peso_minimo * x
+    h_quebras = (xf[None, :] - quebras[:, None] * yf[None, :]).min(axis=1)
+    h_min = (xf[None, :] - w_min[:, None] * yf[None, :]).min(axis=1)
+    
+    f_quebras = (h_quebras[None, :] + quebras[None, :] * y[:, None]) / x[:, None]
+    f_quebras[quebras[None, :] < w_min[:, None]] = -np.inf
+    f_min = (h_min + w_min * y) / x
+    
+    eficiencias = np.minimum(np.maximum(f_quebras.max(axis=1, initial=-np.inf), f_min), 1.0)
+    
+    # v = 1/x_k precisa respeitar o peso mínimo
+    return np.where(1.0 / x >= peso_minimo, eficiencias, 0.0)
 
 
 def identificar_benchmarks(df_dea: pd.DataFrame) -> list:
@@ -168,19 +227,21 @@ def calcular_metas(df_dea: pd.DataFrame) -> pd.DataFrame:
         DataFrame com metas de melhoria
     """
     
-    df_metas = df_dea.copy()
+    gasto = df_dea['gasto_per_capita'].to_numpy(dtype=float)
+    eficiencia = df_dea['eficiencia_dea'].to_numpy(dtype=float)
+    taxa = df_dea['taxa_mortes_100k'].to_numpy(dtype=float)
     
     # Meta de gasto = gasto_atual * eficiencia (redução proporcional)
-    df_metas['meta_gasto'] = (df_metas['gasto_per_capita'] * df_metas['eficiencia_dea']).round(0)
-    
-    # Redução necessária no gasto
-    df_metas['reducao_gasto'] = df_metas['gasto_per_capita'] - df_metas['meta_gasto']
-    df_metas['reducao_gasto_pct'] = ((1 - df_metas['eficiencia_dea']) * 100).round(1)
-    
-    # Meta de taxa = taxa_atual * eficiencia (ou seja, taxa menor)
-    df_metas['meta_taxa'] = (df_metas['taxa_mortes_100k'] * df_metas['eficiencia_dea']).round(1)
-    
-    return df_metas
+    meta_gasto = np.round(gasto * eficiencia, 0)
+    
+    # Meta de taxa = taxa_atual * eficiencia (ou seja, taxa menor);
+    # todas as colunas entram num único assign
+    return df_dea.assign(
+        meta_gasto=meta_gasto,
+        reducao_gasto=gasto - meta_gasto,
+        reducao_gasto_pct=np.round((1 - eficiencia) * 100, 1),
+        meta_taxa=np.round(taxa * eficiencia, 1),
+    )
 
 
 def resumo_dea(df_dea: pd.DataFrame) -> dict:
@@ -194,14 +255,36 @@ def resumo_dea(df_dea: pd.DataFrame) -> dict:
         Dicionário com estatísticas resumidas
     """
     
+    ef = df_dea['eficiencia_dea'].to_numpy(dtype=float)
+    
+    if len(ef) == 0:
+        return {
+            'eficiencia_media': np.nan,
+            'eficiencia_mediana': np.nan,
+            'eficiencia_min': np.nan,
+            'eficiencia_max': np.nan,
+            'n_eficientes': 0,
+            'n_ineficientes': 0,
+            'benchmarks': [],
+            'estado_mais_eficiente': None,
+            'estado_menos_eficiente': None,
+        }
+    
+    # Todas as estatísticas a partir do mesmo array (NaN ignorado, como no
+    # pandas); benchmarks saem da mesma máscara, sem um segundo filtro
+    eficiente = ef >= 0.999
+    estados = df_dea['estado'].to_numpy()
+    
+    # Mais/menos eficiente por posição do máximo/mínimo (primeiro máximo e
+    # último mínimo, como no DataFrame ordenado), sem depender da ordenação
     return {
-        'eficiencia_media': df_dea['eficiencia_dea'].mean(),
-        'eficiencia_mediana': df_dea['eficiencia_dea'].median(),
-        'eficiencia_min': df_dea['eficiencia_dea'].min(),
-        'eficiencia_max': df_dea['eficiencia_dea'].max(),
-        'n_eficientes': (df_dea['eficiencia_dea'] >= 0.999).sum(),
-        'n_ineficientes': (df_dea['eficiencia_dea'] < 0.999).sum(),
-        'benchmarks': identificar_benchmarks(df_dea),
-        'estado_mais_eficiente': df_dea.iloc[0]['estado'] if len(df_dea) > 0 else None,
-        'estado_menos_eficiente': df_dea.iloc[-1]['estado'] if len(df_dea) > 0 else None,
+        'eficiencia_media': np.nanmean(ef),
+        'eficiencia_mediana': np.nanmedian(ef),
+        'eficiencia_min': np.nanmin(ef),
+        'eficiencia_max': np.nanmax(ef),
+        'n_eficientes': eficiente.sum(),
+        'n_ineficientes': (ef < 0.999).sum(),
+        'benchmarks': df_dea['sigla'].to_numpy()[eficiente].tolist(),
+        'estado_mais_eficiente': estados[np.nanargmax(ef)],
+        'estado_menos_eficiente': estados[len(ef) - 1 - np.nanargmin(ef[::-1])],
     }
@@ -1,7 +1,13 @@
 #!/usr/bin/env python3
 """
 Script para exportar gráficos da aplicação para uso no LaTeX.
-Gera figuras em alta resolução (300 DPI) no formato PDF e PNG.
+Gera figuras em alta resolução (300 DPI) no formato PDF.
+
+A resolução pode ser reduzida por variável de ambiente para rascunhos:
+    FIG_DPI=100 python exportar_graficos.py
+
+As cópias PNG versionadas em latex/figuras só são regeneradas com:
+    FIG_PNG=1 python exportar_graficos.py
 """
 
 import pandas as pd
@@ -13,7 +19,9 @@ import matplotlib.pyplot as plt
 import matplotlib
 matplotlib.use('Agg')  # Backend não-interativo
 
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+import os
 import sys
 
 # Adiciona o diretório do projeto ao path
@@ -30,12 +38,31 @@ FIGURAS_DIR.mkdir(parents=True, exist_ok=True)
 
 # Estilo matplotlib
 plt.style.use('seaborn-v0_8-whitegrid')
-plt.rcParams['figure.dpi'] = 300
-plt.rcParams['savefig.dpi'] = 300
+DPI = int(os.environ.get('FIG_DPI', '300'))  # 300 para a versão final
+plt.rcParams['figure.dpi'] = DPI
+plt.rcParams['savefig.dpi'] = DPI
 plt.rcParams['font.size'] = 10
 plt.rcParams['axes.titlesize'] = 12
 plt.rcParams['axes.labelsize'] = 10
 
+# Formatos exportados. O LaTeX só inclui os PDFs; a passada raster em PNG
+# a 300 DPI era a etapa mais cara, então fica opcional (FIG_PNG=1 para
+# atualizar também os PNGs do repositório)
+FORMATOS = ('pdf', 'png') if os.environ.get('FIG_PNG') == '1' else ('pdf',)
+
+def salvar_figura(nome):
+    """Salva a figura atual em cada formato de FORMATOS e a fecha."""
+    fig = plt.gcf()
+    caixa = 'tight'
+    if len(FORMATOS) > 1:
+        # bbox_inches='tight' desenha a figura inteira só para medir a caixa;
+        # com vários formatos, mede uma vez e reaproveita em todos
+        fig.canvas.draw()
+        caixa = fig.get_tightbbox().padded(plt.rcParams['savefig.pad_inches'])
+    for ext in FORMATOS:
+        fig.savefig(FIGURAS_DIR / f'{nome}.{ext}', bbox_inches=caixa)
+    plt.close(fig)
+
 def carregar_dados():
     """Carrega e prepara os dados."""
     print("Carregando dados...")
@@ -44,13 +71,13 @@ def carregar_dados():
 
 def fig1_ranking_violencia(df):
     """Figura 1: Ranking de estados por taxa de violência."""
-    print("Gerando Figura 1: Ranking de violência...")
     
     df_sorted = df.sort_values('taxa_mortes_100k', ascending=True)
     
     fig, ax = plt.subplots(figsize=(10, 8))
     
-    colors = plt.cm.YlOrRd(df_sorted['taxa_mortes_100k'] / df_sorted['taxa_mortes_100k'].max())
+    taxas = df_sorted['taxa_mortes_100k'].to_numpy(dtype=float)
+    colors = plt.cm.YlOrRd(taxas / taxas.max())
     
     bars = ax.barh(df_sorted['sigla'], df_sorted['taxa_mortes_100k'], color=colors)
     
@@ -64,13 +91,10 @@ def fig1_ranking_violencia(df):
                 f'{val:.1f}', va='center', fontsize=8)
     
     plt.tight_layout()
-    plt.savefig(FIGURAS_DIR / 'fig1_ranking_violencia.pdf', bbox_inches='tight')
-    plt.savefig(FIGURAS_DIR / 'fig1_ranking_violencia.png', bbox_inches='tight')
-    plt.close()
+    salvar_figura('fig1_ranking_violencia')
 
 def fig2_gasto_vs_violencia(df):
     """Figura 2: Relação entre gasto per capita e taxa de violência."""
-    print("Gerando Figura 2: Gasto vs Violência...")
     
     fig, ax = plt.subplots(figsize=(10, 7))
     
@@ -83,19 +107,21 @@ def fig2_gasto_vs_violencia(df):
         'Centro-Oeste': '#ff7f00'
     }
     
+    # Um único scatter com a cor de cada ponto já resolvida pela região
+    ax.scatter(df['gasto_per_capita'],
+               df['taxa_mortes_100k'],
+               s=df['populacao']/500000,
+               c=df['regiao'].map(cores_regiao).fillna('gray').tolist(),
+               alpha=0.7)
+    
+    # Legenda: um marcador vazio (sem pontos) por região
     for regiao in df['regiao'].unique():
-        mask = df['regiao'] == regiao
-        ax.scatter(df.loc[mask, 'gasto_per_capita'], 
-                   df.loc[mask, 'taxa_mortes_100k'],
-                   s=df.loc[mask, 'populacao']/500000,
-                   c=cores_regiao.get(regiao, 'gray'),
-                   label=regiao,
-                   alpha=0.7)
+        ax.scatter([], [], c=cores_regiao.get(regiao, 'gray'), label=regiao, alpha=0.7)
     
     # Adiciona labels dos estados
-    for _, row in df.iterrows():
-        ax.annotate(row['sigla'], 
-                    (row['gasto_per_capita'], row['taxa_mortes_100k']),
+    for row in df.itertuples(index=False):
+        ax.annotate(row.sigla, 
+                    (row.gasto_per_capita, row.taxa_mortes_100k),
                     fontsize=7, alpha=0.8)
     
     ax.set_xlabel('Gasto Per Capita em Segurança (R$)')
@@ -104,13 +130,10 @@ def fig2_gasto_vs_violencia(df):
     ax.legend(title='Região', loc='upper right')
     
     plt.tight_layout()
-    plt.savefig(FIGURAS_DIR / 'fig2_gasto_vs_violencia.pdf', bbox_inches='tight')
-    plt.savefig(FIGURAS_DIR / 'fig2_gasto_vs_violencia.png', bbox_inches='tight')
-    plt.close()
+    salvar_figura('fig2_gasto_vs_violencia')
 
 def fig3_eficiencia(df):
     """Figura 3: Índice de eficiência por estado usando DEA 75/25."""
-    print("Gerando Figura 3: Eficiência (DEA 75/25)...")
     
     # Usa o mesmo cálculo DEA da aplicação principal
     # 75% peso no resultado (baixa taxa) + 25% peso na economia (baixo gasto)
@@ -120,8 +143,8 @@ def fig3_eficiencia(df):
     fig, ax = plt.subplots(figsize=(10, 8))
     
     # Cores: verde (>70%), amarelo (40-70%), vermelho (<40%)
-    colors = ['#d73027' if x < 40 else '#fee08b' if x < 70 else '#1a9850' 
-              for x in df_efic['eficiencia_percentual']]
+    ef = df_efic['eficiencia_percentual'].to_numpy()
+    colors = np.select([ef < 40, ef < 70], ['#d73027', '#fee08b'], default='#1a9850')
     
     bars = ax.barh(df_efic['sigla'], df_efic['eficiencia_percentual'], color=colors)
     
@@ -141,13 +164,10 @@ def fig3_eficiencia(df):
     ax.legend(handles=legend_elements, loc='lower right')
     
     plt.tight_layout()
-    plt.savefig(FIGURAS_DIR / 'fig3_eficiencia.pdf', bbox_inches='tight')
-    plt.savefig(FIGURAS_DIR / 'fig3_eficiencia.png', bbox_inches='tight')
-    plt.close()
+    salvar_figura('fig3_eficiencia')
 
 def fig4_otimizacao(df):
     """Figura 4: Resultado da otimização (antes vs depois)."""
-    print("Gerando Figura 4: Otimização...")
     
     resultado = otimizar_alocacao(df, orcamento_disponivel=5000, verbose=False)
     
@@ -171,15 +191,12 @@ def fig4_otimizacao(df):
     ax.legend(loc='lower right')
     
     plt.tight_layout()
-    plt.savefig(FIGURAS_DIR / 'fig4_otimizacao.pdf', bbox_inches='tight')
-    plt.savefig(FIGURAS_DIR / 'fig4_otimizacao.png', bbox_inches='tight')
-    plt.close()
+    salvar_figura('fig4_otimizacao')
     
     return resultado
 
 def fig5_alocacao_otima(df, resultado):
     """Figura 5: Alocação ótima de recursos."""
-    print("Gerando Figura 5: Alocação ótima...")
     
     df_aloc = resultado.alocacao.sort_values('investimento_milhoes', ascending=True)
     df_aloc = df_aloc[df_aloc['investimento_milhoes'] > 0]  # Só mostra quem recebeu
@@ -199,13 +216,10 @@ def fig5_alocacao_otima(df, resultado):
                 f'R$ {val:.0f} mi', va='center', fontsize=8)
     
     plt.tight_layout()
-    plt.savefig(FIGURAS_DIR / 'fig5_alocacao_otima.pdf', bbox_inches='tight')
-    plt.savefig(FIGURAS_DIR / 'fig5_alocacao_otima.png', bbox_inches='tight')
-    plt.close()
+    salvar_figura('fig5_alocacao_otima')
 
 def fig6_elasticidade(df):
     """Figura 6: Elasticidade por estado."""
-    print("Gerando Figura 6: Elasticidade...")
     
     df_elast = df[['sigla', 'estado', 'regiao', 'elasticidade']].copy()
     df_elast = df_elast.sort_values('elasticidade', ascending=True)
@@ -234,43 +248,38 @@ def fig6_elasticidade(df):
     ax.legend(handles=legend_elements, loc='lower right', title='Região')
     
     plt.tight_layout()
-    plt.savefig(FIGURAS_DIR / 'fig6_elasticidade.pdf', bbox_inches='tight')
-    plt.savefig(FIGURAS_DIR / 'fig6_elasticidade.png', bbox_inches='tight')
-    plt.close()
+    salvar_figura('fig6_elasticidade')
 
 def fig7_regiao(df):
     """Figura 7: Mortes por região."""
-    print("Gerando Figura 7: Por região...")
     
-    df_regiao = df.groupby('regiao').agg({
-        'mortes_violentas': 'sum',
-        'populacao': 'sum',
-        'orcamento_2022_milhoes': 'sum'
-    }).reset_index()
+    # Somas por região com bincount sobre os códigos de região (5 grupos)
+    regioes, codigo = np.unique(df['regiao'].to_numpy(), return_inverse=True)
+    mortes = np.bincount(codigo, weights=df['mortes_violentas'].to_numpy(dtype=float))
+    populacao = np.bincount(codigo, weights=df['populacao'].to_numpy(dtype=float))
+    orcamento = np.bincount(codigo, weights=df['orcamento_2022_milhoes'].to_numpy(dtype=float))
     
-    df_regiao['taxa'] = df_regiao['mortes_violentas'] / df_regiao['populacao'] * 100000
-    df_regiao = df_regiao.sort_values('taxa', ascending=True)
+    taxa = mortes / populacao * 100000
+    ordem = np.argsort(taxa, kind='stable')
+    regioes, taxa, orcamento = regioes[ordem], taxa[ordem], orcamento[ordem]
     
     fig, axes = plt.subplots(1, 2, figsize=(12, 5))
     
     # Gráfico 1: Taxa por região
-    axes[0].barh(df_regiao['regiao'], df_regiao['taxa'], color='#ff6b6b')
+    axes[0].barh(regioes, taxa, color='#ff6b6b')
     axes[0].set_xlabel('Taxa de Mortes por 100 mil hab.')
     axes[0].set_title('Taxa de Violência por Região')
     
     # Gráfico 2: Orçamento por região
-    axes[1].barh(df_regiao['regiao'], df_regiao['orcamento_2022_milhoes']/1000, color='#2196F3')
+    axes[1].barh(regioes, orcamento/1000, color='#2196F3')
     axes[1].set_xlabel('Orçamento de Segurança (R$ bilhões)')
     axes[1].set_title('Investimento em Segurança por Região')
     
     plt.tight_layout()
-    plt.savefig(FIGURAS_DIR / 'fig7_regiao.pdf', bbox_inches='tight')
-    plt.savefig(FIGURAS_DIR / 'fig7_regiao.png', bbox_inches='tight')
-    plt.close()
+    salvar_figura('fig7_regiao')
 
 def fig8_sensibilidade():
     """Figura 8: Análise de sensibilidade."""
-    print("Gerando Figura 8: Sensibilidade...")
     
     # Dados de sensibilidade (simulados para diferentes orçamentos)
     orcamentos = [1000, 2000, 3000, 4000, 5000, 6000, 7000, 8000, 9000, 10000]
@@ -290,9 +299,12 @@ def fig8_sensibilidade():
     ax.grid(True, alpha=0.3)
     
     plt.tight_layout()
-    plt.savefig(FIGURAS_DIR / 'fig8_sensibilidade.pdf', bbox_inches='tight')
-    plt.savefig(FIGURAS_DIR / 'fig8_sensibilidade.png', bbox_inches='tight')
-    plt.close()
+    salvar_figura('fig8_sensibilidade')
+
+def fig4_e_fig5(df):
+    """Figuras 4 e 5 em sequência (a 5 usa o resultado da otimização da 4)."""
+    resultado = fig4_otimizacao(df)
+    fig5_alocacao_otima(df, resultado)
 
 def main():
     """Função principal."""
@@ -302,11 +314,21 @@ def main():
     
     df = carregar_dados()
     
-    fig1_ranking_violencia(df)
-    fig2_gasto_vs_violencia(df)
-    fig3_eficiencia(df)
-    resultado = fig4_otimizacao(df)
-    fig5_alocacao_otima(df, resultado)
+    # As figuras são independentes (só leem df) e o custo é a renderização
+    # do matplotlib, então cada uma roda em um processo; fig5 depende do
+    # resultado da fig4 e as duas seguem juntas no mesmo processo. O
+    # progresso é impresso aqui, à medida que cada processo termina, para
+    # que as linhas dos processos não se misturem
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        tarefas = {
+            executor.submit(fig1_ranking_violencia, df): "Figura 1: Ranking de violência",
+            executor.submit(fig2_gasto_vs_violencia, df): "Figura 2: Gasto vs Violência",
+            executor.submit(fig3_eficiencia, df): "Figura 3: Eficiência (DEA 75/25)",
+            executor.submit(fig4_e_fig5, df): "Figuras 4 e 5: Otimização e alocação ótima",
+        }
+        for tarefa in as_completed(tarefas):
+            tarefa.result()  # propaga exceções dos processos
+            print(f"Concluído: {tarefas[tarefa]}")
     # fig4_otimizacao - Removido do LaTeX
     # fig6_elasticidade - Removido
     # fig7_regiao - Removido
@@ -26,11 +26,15 @@ from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-from concurrent.futures import ProcessPoolExecutor
+from scipy.stats import truncnorm
 import warnings
 
 from otimizacao import otimizar_alocacao, ResultadoOtimizacao
 
+# Simulações processadas por bloco no Monte Carlo vetorizado: com 27 estados,
+# as matrizes float32 de um bloco (~55 KB) cabem na cache L2
+TAMANHO_BLOCO_MC = 256
+
 
 @dataclass
 class ResultadoMonteCarlo:
@@ -41,8 +45,115 @@ class ResultadoMonteCarlo:
     desvio_padrao_reducao: float
     intervalo_confianca_95: Tuple[float, float]
     percentis: Dict[int, float]
-    distribuicao_reducao: List[float]
-    distribuicao_custo: List[float]
+    distribuicao_reducao: np.ndarray
+    distribuicao_custo: np.ndarray
+
+
+def _mc_bloco(
+    coef_estado: np.ndarray,
+    n_sim: int,
+    incerteza_elasticidade: float,
+    incerteza_taxa: float,
+    semente: np.random.SeedSequence
+) -> np.ndarray:
+    """
+    Calcula as reduções de um bloco de simulações do Monte Carlo vetorizado.
+    
+    Args:
+        coef_estado: Coeficiente fixo de redução de cada estado
+        n_sim: Número de simulações do bloco
+        incerteza_elasticidade: Coeficiente de variação da elasticidade
+        incerteza_taxa: Coeficiente de variação da taxa de mortes
+        semente: SeedSequence filha exclusiva do bloco
+    
+    Returns:
+        Array float32 com a redução de cada simulação do bloco
+    """
+    # PCG64DXSM: variante recomendada do PCG64 para muitos fluxos paralelos
+    rng = np.random.Generator(np.random.PCG64DXSM(semente))
+    
+    # As perturbações são montadas in-place no próprio buffer de ruído, sem
+    # criar matrizes temporárias a cada operação
+    ruido = rng.standard_normal((2, n_sim, len(coef_estado)), dtype=np.float32)
+    perturbacao_elast, perturbacao_mortes = ruido
+    
+    perturbacao_elast *= incerteza_elasticidade
+    perturbacao_elast += 1.0
+    np.clip(perturbacao_elast, 0.3, 2.0, out=perturbacao_elast)  # Limita variação
+    
+    perturbacao_mortes *= incerteza_taxa
+    perturbacao_mortes += 1.0
+    np.clip(perturbacao_mortes, 0.7, 1.3, out=perturbacao_mortes)
+    
+    perturbacao_elast *= perturbacao_mortes
+    return perturbacao_elast @ coef_estado
+
+
+def _sortear_elasticidades(
+    rng: np.random.Generator,
+    elast_base: np.ndarray,
+    incerteza_elasticidade: float,
+    size: Optional[Tuple[int, ...]] = None
+) -> np.ndarray:
+    """
+    Sorteia elasticidades de uma normal truncada em [0.01, 0.30].
+    
+    Ao contrário de sortear da normal e aplicar clip, não acumula massa
+    nos limites quando a elasticidade base está perto deles.
+    
+    Args:
+        rng: Gerador de números aleatórios
+        elast_base: Elasticidade base (média) de cada estado
+        incerteza_elasticidade: Coeficiente de variação da elasticidade
+        size: Formato da amostra (None = um valor por estado)
+    
+    Returns:
+        Array com as elasticidades sorteadas
+    """
+    if incerteza_elasticidade <= 0:
+        # Sem incerteza a distribuição degenera na própria base
+        forma = elast_base.shape if size is None else size
+        return np.broadcast_to(np.clip(elast_base, 0.01, 0.30), forma).copy()
+    
+    desvio = elast_base * incerteza_elasticidade
+    a = (0.01 - elast_base) / desvio
+    b = (0.30 - elast_base) / desvio
+    return truncnorm.rvs(a, b, loc=elast_base, scale=desvio, size=size, random_state=rng)
+
+
+def _mc_simulacao_lp(
+    df_sim: pd.DataFrame,
+    orcamento: float,
+    validos_elast: np.ndarray,
+    validos_mortes: np.ndarray,
+    parametros: Tuple[np.ndarray, np.ndarray]
+) -> Optional[Tuple[float, float]]:
+    """
+    Resolve o PL de uma simulação do Monte Carlo completo.
+    
+    Args:
+        df_sim: Cópia de trabalho dos dados, sobrescrita in-place a cada
+                simulação (todas as linhas perturbadas são reescritas)
+        orcamento: Orçamento disponível
+        validos_elast: Máscara das linhas com elasticidade
+        validos_mortes: Máscara das linhas com mortes
+        parametros: Tupla (elasticidades, mortes) sorteadas para a simulação
+    
+    Returns:
+        Tupla (reducao, custo_por_vida) ou None se o PL não for ótimo
+    """
+    elasticidades, mortes = parametros
+    df_sim.loc[validos_elast, 'elasticidade'] = elasticidades
+    df_sim.loc[validos_mortes, 'mortes_violentas'] = mortes
+    
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        resultado = otimizar_alocacao(df_sim, orcamento, verbose=False)
+    
+    if resultado.status != 'Optimal':
+        return None
+    custo = resultado.orcamento_usado / resultado.reducao_crimes if resultado.reducao_crimes > 0 else np.nan
+    return resultado.reducao_crimes, custo
 
 
 def simular_parametros(
@@ -66,32 +177,19 @@ def simular_parametros(
     Returns:
         DataFrame com parâmetros perturbados
     """
-    if seed is not None:
-        np.random.seed(seed)
-    
+    rng = np.random.default_rng(seed)
     df = df_dados.copy()
     
     # Perturba elasticidade (distribuição normal, truncada em [0.01, 0.30])
-    for idx in df.index:
-        if pd.notna(df.loc[idx, 'elasticidade']):
-            elast_base = df.loc[idx, 'elasticidade']
-            elast_std = elast_base * incerteza_elasticidade
-            
-            nova_elast = np.random.normal(elast_base, elast_std)
-            nova_elast = np.clip(nova_elast, 0.01, 0.30)
-            
-            df.loc[idx, 'elasticidade'] = nova_elast
+    validos = df['elasticidade'].notna().to_numpy()
+    elast_base = df['elasticidade'].to_numpy(dtype=float)[validos]
+    df.loc[validos, 'elasticidade'] = _sortear_elasticidades(rng, elast_base, incerteza_elasticidade)
     
     # Perturba taxa de mortes (menor incerteza, dado que é observado)
-    for idx in df.index:
-        if pd.notna(df.loc[idx, 'mortes_violentas']):
-            mortes_base = df.loc[idx, 'mortes_violentas']
-            mortes_std = mortes_base * incerteza_taxa
-            
-            novas_mortes = np.random.normal(mortes_base, mortes_std)
-            novas_mortes = max(1, int(novas_mortes))
-            
-            df.loc[idx, 'mortes_violentas'] = novas_mortes
+    validos = df['mortes_violentas'].notna().to_numpy()
+    mortes_base = df['mortes_violentas'].to_numpy(dtype=float)[validos]
+    novas_mortes = rng.normal(mortes_base, mortes_base * incerteza_taxa)
+    df.loc[validos, 'mortes_violentas'] = np.maximum(1, novas_mortes.astype(int))
     
     return df
 
@@ -124,9 +222,6 @@ def executar_monte_carlo(
     Returns:
         ResultadoMonteCarlo com estatísticas
     """
-    if seed is not None:
-        np.random.seed(seed)
-    
     # Resolve otimização base UMA VEZ para obter alocação ótima
     with warnings.catch_warnings():
         warnings.simplefilter("ignore")
@@ -142,57 +237,49 @@ def executar_monte_carlo(
     # Extrai dados para vetorização
     df = df_dados.dropna(subset=['orcamento_2022_milhoes', 'elasticidade', 'mortes_violentas']).copy()
     
-    mortes = df['mortes_violentas'].values
-    elasticidade = df['elasticidade'].values
-    orcamento_atual = df['orcamento_2022_milhoes'].values
+    # float32: a variância do estimador domina o arredondamento, e metade
+    # dos bytes por elemento dobra a vazão das operações vetoriais
+    mortes = df['mortes_violentas'].values.astype(np.float32)
+    elasticidade = df['elasticidade'].values.astype(np.float32)
+    orcamento_atual = df['orcamento_2022_milhoes'].values.astype(np.float32)
     
     # Obtém alocação base (investimento por estado)
     alocacao_base = resultado_base.alocacao.set_index('sigla')
     investimentos = np.array([
         alocacao_base.loc[s, 'investimento_milhoes'] if s in alocacao_base.index else 0 
         for s in df['sigla']
-    ])
+    ], dtype=np.float32)
     
     # Simulação vetorizada - MUITO mais rápida
-    n_estados = len(mortes)
-    
-    # Gera todas as perturbações de uma vez (n_simulacoes x n_estados)
-    perturbacao_elast = np.random.normal(1.0, incerteza_elasticidade, (n_simulacoes, n_estados))
-    perturbacao_elast = np.clip(perturbacao_elast, 0.3, 2.0)  # Limita variação
-    
-    perturbacao_mortes = np.random.normal(1.0, incerteza_taxa, (n_simulacoes, n_estados))
-    perturbacao_mortes = np.clip(perturbacao_mortes, 0.7, 1.3)
-    
-    # Calcula redução para cada simulação (vetorizado)
     # Redução = Σ mortes[i] * elasticidade[i] * investimento[i] / orcamento[i]
-    reducoes = np.zeros(n_simulacoes)
-    
-    for sim in range(n_simulacoes):
-        elast_sim = elasticidade * perturbacao_elast[sim]
-        mortes_sim = mortes * perturbacao_mortes[sim]
-        
-        # Calcula redução com parâmetros perturbados
-        reducao = np.sum(
-            mortes_sim * elast_sim * investimentos / orcamento_atual
-        )
-        reducoes[sim] = reducao
-    
-    # Calcula estatísticas
-    media = np.mean(reducoes)
-    std = np.std(reducoes)
+    # Os termos fixos por estado viram um vetor de coeficientes, e a soma
+    # sobre estados de cada simulação sai de um produto matricial
+    coef_estado = mortes * elasticidade * investimentos / orcamento_atual
+
+    # Processa em blocos para que as matrizes de perturbação fiquem na cache.
+    # Cada bloco recebe uma semente filha da SeedSequence base, então os
+    # fluxos dos blocos são independentes entre si
+    inicios = range(0, n_simulacoes, TAMANHO_BLOCO_MC)
+    sementes = np.random.SeedSequence(seed).spawn(len(inicios))
+    blocos = [
+        _mc_bloco(coef_estado, min(TAMANHO_BLOCO_MC, n_simulacoes - inicio),
+                  incerteza_elasticidade, incerteza_taxa, semente)
+        for inicio, semente in zip(inicios, sementes)
+    ]
+    
+    reducoes = np.concatenate(blocos) if blocos else np.empty(0, dtype=np.float32)
+    
+    # Calcula estatísticas (acumuladas em float64 sobre a amostra float32)
+    media = float(reducoes.mean(dtype=np.float64))
+    std = float(reducoes.std(dtype=np.float64))
     
     # Intervalo de confiança 95%
-    ic_inferior = np.percentile(reducoes, 2.5)
-    ic_superior = np.percentile(reducoes, 97.5)
-    
-    # Percentis
-    percentis = {
-        5: np.percentile(reducoes, 5),
-        25: np.percentile(reducoes, 25),
-        50: np.percentile(reducoes, 50),
-        75: np.percentile(reducoes, 75),
-        95: np.percentile(reducoes, 95)
-    }
+    ic_inferior, ic_superior = (float(v) for v in np.percentile(reducoes, [2.5, 97.5]))
+    
+    # Percentis: uma única chamada reaproveita a mesma ordenação (mesma
+    # definição, com interpolação linear, usada em _executar_monte_carlo_lento)
+    niveis = [5, 25, 50, 75, 95]
+    percentis = {p: float(v) for p, v in zip(niveis, np.percentile(reducoes, niveis))}
     
     # Custo por vida
     custos = orcamento / reducoes
@@ -205,8 +292,8 @@ def executar_monte_carlo(
         desvio_padrao_reducao=round(std, 1),
         intervalo_confianca_95=(round(ic_inferior, 1), round(ic_superior, 1)),
         percentis={k: round(v, 1) for k, v in percentis.items()},
-        distribuicao_reducao=reducoes.tolist(),
-        distribuicao_custo=custos.tolist()
+        distribuicao_reducao=reducoes,
+        distribuicao_custo=custos
     )
 
 
@@ -223,58 +310,59 @@ def _executar_monte_carlo_lento(
     Versão original (lenta) do Monte Carlo - resolve PL completo para cada simulação.
     Usado como fallback se a versão otimizada falhar.
     """
-    if seed is not None:
-        np.random.seed(seed)
+    # Sorteia de uma vez as matrizes (n_simulacoes, n_estados) de parâmetros,
+    # em vez de re-semear e sortear estado a estado a cada simulação
+    rng = np.random.default_rng(seed)
+    validos_elast = df_dados['elasticidade'].notna().to_numpy()
+    validos_mortes = df_dados['mortes_violentas'].notna().to_numpy()
+    elast_base = df_dados['elasticidade'].to_numpy(dtype=float)[validos_elast]
+    mortes_base = df_dados['mortes_violentas'].to_numpy(dtype=float)[validos_mortes]
+    
+    sorteios_elast = _sortear_elasticidades(
+        rng, elast_base, incerteza_elasticidade, size=(n_simulacoes, len(elast_base))
+    )
+    sorteios_mortes = np.maximum(
+        1,
+        rng.normal(mortes_base, mortes_base * incerteza_taxa,
+                   size=(n_simulacoes, len(mortes_base))).astype(int)
+    )
     
-    reducoes = []
-    custos = []
+    # Amostras gravadas em arrays pré-alocados (a distribuição completa é
+    # usada pelos percentis e pelo histograma); só as n_sucesso
+    # primeiras posições são válidas ao final
+    reducoes = np.empty(n_simulacoes)
+    custos = np.empty(n_simulacoes)
     n_sucesso = 0
     
     if verbose:
         print(f"🎲 Executando {n_simulacoes} simulações Monte Carlo...")
     
-    for i in range(n_simulacoes):
-        # Gera parâmetros perturbados
-        df_sim = simular_parametros(
-            df_dados, 
-            incerteza_elasticidade,
-            incerteza_taxa,
-            seed=seed + i if seed else None
-        )
-        
-        # Resolve otimização
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore")
-            resultado = otimizar_alocacao(df_sim, orcamento, verbose=False)
-        
-        if resultado.status == 'Optimal':
-            reducoes.append(resultado.reducao_crimes)
-            custo = resultado.orcamento_usado / resultado.reducao_crimes if resultado.reducao_crimes > 0 else np.nan
-            custos.append(custo)
+    # Uma única cópia de trabalho é reaproveitada, em vez de uma por simulação
+    df_sim = df_dados.copy()
+    
+    for i, parametros in enumerate(zip(sorteios_elast, sorteios_mortes)):
+        resultado = _mc_simulacao_lp(df_sim, orcamento, validos_elast, validos_mortes, parametros)
+        if resultado is not None:
+            reducoes[n_sucesso], custos[n_sucesso] = resultado
             n_sucesso += 1
         
         if verbose and (i + 1) % 100 == 0:
             print(f"  Progresso: {i + 1}/{n_simulacoes} ({(i+1)/n_simulacoes*100:.0f}%)")
     
     # Calcula estatísticas
-    reducoes = np.array(reducoes)
-    custos = np.array([c for c in custos if not np.isnan(c)])
+    reducoes = reducoes[:n_sucesso]
+    custos = custos[:n_sucesso]
+    custos = custos[~np.isnan(custos)]
     
-    media = np.mean(reducoes)
-    std = np.std(reducoes)
+    media = float(reducoes.mean(dtype=np.float64))
+    std = float(reducoes.std(dtype=np.float64))
     
     # Intervalo de confiança 95%
-    ic_inferior = np.percentile(reducoes, 2.5)
-    ic_superior = np.percentile(reducoes, 97.5)
-    
-    # Percentis
-    percentis = {
-        5: np.percentile(reducoes, 5),
-        25: np.percentile(reducoes, 25),
-        50: np.percentile(reducoes, 50),
-        75: np.percentile(reducoes, 75),
-        95: np.percentile(reducoes, 95)
-    }
+    ic_inferior, ic_superior = (float(v) for v in np.percentile(reducoes, [2.5, 97.5]))
+    
+    # Percentis: uma única chamada reaproveita a mesma ordenação
+    niveis = [5, 25, 50, 75, 95]
+    percentis = {p: float(v) for p, v in zip(niveis, np.percentile(reducoes, niveis))}
     
     return ResultadoMonteCarlo(
         n_simulacoes=n_simulacoes,
@@ -283,8 +371,8 @@ def _executar_monte_carlo_lento(
         desvio_padrao_reducao=round(std, 1),
         intervalo_confianca_95=(round(ic_inferior, 1), round(ic_superior, 1)),
         percentis={k: round(v, 1) for k, v in percentis.items()},
-        distribuicao_reducao=reducoes.tolist(),
-        distribuicao_custo=custos.tolist()
+        distribuicao_reducao=reducoes,
+        distribuicao_custo=custos
     )
 
 
@@ -308,15 +396,11 @@ def gerar_cenarios_elasticidade(
     Returns:
         Dicionário com DataFrames para cada cenário
     """
-    df_otimista = df_dados.copy()
-    df_pessimista = df_dados.copy()
-    
-    df_otimista['elasticidade'] = df_otimista['elasticidade'] * fator_otimista
-    df_pessimista['elasticidade'] = df_pessimista['elasticidade'] * fator_pessimista
+    base = df_dados['elasticidade'].to_numpy(dtype=float)
     
-    # Limita elasticidade a valores razoáveis
-    df_otimista['elasticidade'] = df_otimista['elasticidade'].clip(upper=0.25)
-    df_pessimista['elasticidade'] = df_pessimista['elasticidade'].clip(lower=0.03)
+    # Escala e limita a elasticidade a valores razoáveis numa única passada
+    df_otimista = df_dados.assign(elasticidade=np.minimum(base * fator_otimista, 0.25))
+    df_pessimista = df_dados.assign(elasticidade=np.maximum(base * fator_pessimista, 0.03))
     
     return {
         'pessimista': df_pessimista,
@@ -339,23 +423,40 @@ def comparar_cenarios(
     Returns:
         DataFrame comparativo
     """
-    resultados = []
+    resultados = [otimizar_alocacao(df, orcamento) for df in cenarios.values()]
+    
+    otimos = [
+        (nome, resultado) for nome, resultado in zip(cenarios, resultados)
+        if resultado.status == 'Optimal'
+    ]
+    
+    reducoes = np.array([r.reducao_crimes for _, r in otimos], dtype=float)
+    usados = np.array([r.orcamento_usado for _, r in otimos], dtype=float)
+    custo_por_vida = np.divide(usados, reducoes, out=np.full_like(usados, np.nan), where=reducoes > 0)
+    
+    return pd.DataFrame({
+        'cenario': [nome.capitalize() for nome, _ in otimos],
+        'reducao_crimes': [r.reducao_crimes for _, r in otimos],
+        'reducao_pct': [r.reducao_percentual for _, r in otimos],
+        'orcamento_usado': usados,
+        'custo_por_vida': np.round(custo_por_vida, 2),
+    })
+
+
+def histograma_barras(amostra: np.ndarray, nbins: int = 30, **kwargs) -> go.Bar:
+    """
+    Histograma pré-agregado com np.histogram, desenhado como go.Bar.
     
-    for nome, df in cenarios.items():
-        resultado = otimizar_alocacao(df, orcamento)
-        
-        if resultado.status == 'Optimal':
-            resultados.append({
-                'cenario': nome.capitalize(),
-                'reducao_crimes': resultado.reducao_crimes,
-                'reducao_pct': resultado.reducao_percentual,
-                'orcamento_usado': resultado.orcamento_usado,
-                'custo_por_vida': round(
-                    resultado.orcamento_usado / resultado.reducao_crimes, 2
-                ) if resultado.reducao_crimes > 0 else np.nan
-            })
-    
-    return pd.DataFrame(resultados)
+    Envia ao navegador só as contagens dos nbins intervalos, e não a
+    amostra inteira que go.Histogram agruparia no cliente.
+    """
+    contagens, bordas = np.histogram(amostra, bins=nbins)
+    return go.Bar(
+        x=(bordas[:-1] + bordas[1:]) / 2,
+        y=contagens,
+        width=np.diff(bordas),
+        **kwargs
+    )
 
 
 def gerar_grafico_monte_carlo(resultado: ResultadoMonteCarlo) -> go.Figure:
@@ -378,9 +479,8 @@ def gerar_grafico_monte_carlo(resultado: ResultadoMonteCarlo) -> go.Figure:
     
     # Histograma de vidas salvas
     fig.add_trace(
-        go.Histogram(
-            x=resultado.distribuicao_reducao,
-            nbinsx=30,
+        histograma_barras(
+            resultado.distribuicao_reducao,
             name='Vidas Salvas',
             marker_color='#3498db',
             opacity=0.7
@@ -408,9 +508,8 @@ def gerar_grafico_monte_carlo(resultado: ResultadoMonteCarlo) -> go.Figure:
     
     # Histograma de custo
     fig.add_trace(
-        go.Histogram(
-            x=resultado.distribuicao_custo,
-            nbinsx=30,
+        histograma_barras(
+            resultado.distribuicao_custo,
             name='Custo/Vida',
             marker_color='#e74c3c',
             opacity=0.7
@@ -26,11 +26,12 @@
 import pandas as pd
 import numpy as np
 from pulp import (
-    LpProblem, LpMinimize, LpVariable, lpSum,
+    LpProblem, LpMinimize, LpVariable, LpAffineExpression,
     LpStatus, value, PULP_CBC_CMD
 )
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
+from functools import lru_cache
 
 
 @dataclass
@@ -45,6 +46,39 @@ class ResultadoMultiPeriodo:
     trajetoria_crimes: pd.DataFrame
 
 
+# Colunas de df_dados lidas por otimizar_multi_periodo
+COLUNAS_MODELO = [
+    'sigla', 'estado', 'regiao',
+    'mortes_violentas', 'orcamento_2022_milhoes', 'elasticidade'
+]
+
+
+@lru_cache(maxsize=32)
+def _matriz_depreciacao(n_periodos: int, depreciacao_anual: float) -> np.ndarray:
+    """
+    Matriz triangular inferior de depreciação do estoque de investimento.
+    
+    D[t, s] = (1 - depreciacao)^(t - s) se s <= t, e 0 caso contrário, de
+    modo que estoque = D @ investimentos. É calculada uma vez por combinação
+    de parâmetros e reaproveitada entre as estratégias de comparar_estrategias.
+    
+    Args:
+        n_periodos: Número de períodos
+        depreciacao_anual: Taxa de depreciação do estoque
+    
+    Returns:
+        Array (n_periodos x n_periodos), somente leitura
+    """
+    defasagem = np.subtract.outer(np.arange(n_periodos), np.arange(n_periodos))
+    matriz = np.where(
+        defasagem >= 0,
+        (1 - depreciacao_anual) ** np.maximum(defasagem, 0),
+        0.0
+    )
+    matriz.setflags(write=False)
+    return matriz
+
+
 def otimizar_multi_periodo(
     df_dados: pd.DataFrame,
     orcamentos_por_periodo: List[float],
@@ -81,14 +115,14 @@ def otimizar_multi_periodo(
     n_periodos = len(orcamentos_por_periodo)
     periodos = list(range(1, n_periodos + 1))
     
-    # Parâmetros
-    mortes = dict(zip(df['sigla'], df['mortes_violentas']))
-    orcamento_atual = dict(zip(df['sigla'], df['orcamento_2022_milhoes']))
-    elasticidade = dict(zip(df['sigla'], df['elasticidade']))
+    # Parâmetros como arrays indexados pela posição do estado
+    mortes = df['mortes_violentas'].to_numpy(dtype=float)
+    orcamento_atual = df['orcamento_2022_milhoes'].to_numpy(dtype=float)
+    elasticidade = df['elasticidade'].to_numpy(dtype=float)
     
     # Limites
-    inv_min = {e: orcamento_atual[e] * investimento_min_pct / 100 for e in estados}
-    inv_max = {e: orcamento_atual[e] * investimento_max_pct / 100 for e in estados}
+    inv_min = orcamento_atual * investimento_min_pct / 100
+    inv_max = orcamento_atual * investimento_max_pct / 100
     
     # ==========================================================================
     # MODELO DE PROGRAMAÇÃO LINEAR MULTI-PERÍODO
@@ -96,27 +130,17 @@ def otimizar_multi_periodo(
     
     modelo = LpProblem("Alocacao_Multi_Periodo", LpMinimize)
     
-    # Variáveis de decisão: x[estado, periodo]
-    x = {}
-    for e in estados:
-        for t in periodos:
-            x[e, t] = LpVariable(
+    # Variáveis de decisão: x[estado, periodo], matriz (estados x períodos)
+    x = np.empty((len(estados), n_periodos), dtype=object)
+    for i, e in enumerate(estados):
+        for j, t in enumerate(periodos):
+            x[i, j] = LpVariable(
                 name=f"invest_{e}_t{t}",
-                lowBound=inv_min[e],
-                upBound=inv_max[e],
+                lowBound=inv_min[i],
+                upBound=inv_max[i],
                 cat='Continuous'
             )
     
-    # Variáveis auxiliares: estoque acumulado de investimento por estado/período
-    # estoque[e,t] = x[e,t] + (1-depreciacao) * estoque[e,t-1]
-    estoque = {}
-    for e in estados:
-        for t in periodos:
-            if t == 1:
-                estoque[e, t] = x[e, t]
-            else:
-                estoque[e, t] = x[e, t] + (1 - depreciacao_anual) * estoque[e, t-1]
-    
     # --------------------------------------------------------------------------
     # FUNÇÃO OBJETIVO
     # --------------------------------------------------------------------------
@@ -125,30 +149,36 @@ def otimizar_multi_periodo(
     #
     # Para linearizar, minimizamos:
     # Σ_t Σ_e [ -mortes[e] × elasticidade[e] × estoque[e,t] / orcamento[e] ]
+    #
+    # Com estoque[e,t] = Σ_{s≤t} (1-depreciacao)^(t-s) × x[e,s], o coeficiente
+    # de x[e,s] é -efeito[e] × Σ_{t≥s} desconto[t] × D[t,s]: a matriz de
+    # coeficientes sai de um produto externo, sem expressões de estoque
     # --------------------------------------------------------------------------
     
     # Peso para períodos futuros (desconto temporal - opcional)
-    desconto = {t: 1.0 for t in periodos}  # Sem desconto por padrão
+    desconto = np.ones(n_periodos)  # Sem desconto por padrão
     
-    modelo += lpSum([
-        desconto[t] * (-mortes[e] * elasticidade[e] * estoque[e, t] / orcamento_atual[e])
-        for e in estados
-        for t in periodos
-    ]), "Funcao_Objetivo"
+    efeito = mortes * elasticidade / orcamento_atual
+    coef = -np.outer(efeito, desconto @ _matriz_depreciacao(n_periodos, depreciacao_anual))
+    
+    # A expressão é montada direto dos pares (variável, coeficiente), sem
+    # criar uma expressão intermediária por termo como em lpSum(c * x)
+    modelo += LpAffineExpression(zip(x.ravel().tolist(), coef.ravel().tolist())), "Funcao_Objetivo"
     
     # --------------------------------------------------------------------------
     # RESTRIÇÕES
     # --------------------------------------------------------------------------
     
     # Restrição 1: Orçamento por período
-    for t in periodos:
+    for j, t in enumerate(periodos):
         modelo += (
-            lpSum([x[e, t] for e in estados]) <= orcamentos_por_periodo[t-1],
+            LpAffineExpression((v, 1) for v in x[:, j].tolist()) <= orcamentos_por_periodo[j],
             f"Orcamento_Periodo_{t}"
         )
     
-    # Resolve
-    solver = PULP_CBC_CMD(msg=verbose)
+    # Resolve. O modelo é um PL pequeno e só contínuo: presolve, cortes e
+    # strong branching seriam trabalho extra do CBC sem efeito na solução
+    solver = PULP_CBC_CMD(msg=verbose, presolve=False, cuts=False, strong=0)
     modelo.solve(solver)
     
     status = LpStatus[modelo.status]
@@ -170,68 +200,51 @@ def otimizar_multi_periodo(
     
     alocacao_por_periodo = {}
     reducao_por_periodo = {}
-    trajetoria_lista = []
-    orcamento_total = 0
+    
+    # Investimentos (estados x períodos) e estoque acumulado com depreciação:
+    # estoque[e, t] = Σ_{s≤t} (1-δ)^(t-s) × x[e, s], num único produto matricial
+    investimentos = np.array([[value(v) for v in linha] for linha in x], dtype=float)
+    estoque_acum = investimentos @ _matriz_depreciacao(n_periodos, depreciacao_anual).T
+    
+    # Redução de crimes baseada no estoque acumulado
+    crimes_base = df['mortes_violentas'].values
+    reducoes = efeito[:, None] * estoque_acum
+    crimes_apos = np.maximum(0, crimes_base[:, None] - reducoes)
+    
+    # Tabelas construídas por colunas a partir das matrizes (estados x períodos)
+    investimentos_2 = np.round(investimentos, 2)
+    estoque_2 = np.round(estoque_acum, 2)
+    crimes_apos_0 = np.round(crimes_apos, 0)
+    reducoes_0 = np.round(reducoes, 0)
+    reducao_periodos = reducoes.sum(axis=0)
+    identificacao = {'estado': df['estado'].to_numpy(), 'regiao': df['regiao'].to_numpy()}
+    
+    orcamento_total = investimentos.sum()
     reducao_total = 0
     
-    for t in periodos:
-        alocacao_lista = []
-        reducao_periodo = 0
-        
-        for e in estados:
-            investimento = value(x[e, t])
-            
-            # Calcula estoque acumulado até t
-            estoque_acum = 0
-            for s in range(1, t + 1):
-                invest_s = value(x[e, s])
-                # Aplica depreciação para investimentos de períodos anteriores
-                anos_passados = t - s
-                fator_dep = (1 - depreciacao_anual) ** anos_passados
-                estoque_acum += invest_s * fator_dep
-            
-            # Redução de crimes baseada no estoque acumulado
-            crimes_base = mortes[e]
-            reducao = crimes_base * elasticidade[e] * estoque_acum / orcamento_atual[e]
-            crimes_apos = max(0, crimes_base - reducao)
-            
-            alocacao_lista.append({
-                'sigla': e,
-                'periodo': t,
-                'investimento': round(investimento, 2),
-                'estoque_acumulado': round(estoque_acum, 2),
-                'crimes_base': crimes_base,
-                'crimes_apos': round(crimes_apos, 0),
-                'reducao': round(reducao, 0)
-            })
-            
-            reducao_periodo += reducao
-            orcamento_total += investimento
-        
-        df_periodo = pd.DataFrame(alocacao_lista)
-        
-        # Merge com dados do estado
-        df_periodo = pd.merge(
-            df_periodo,
-            df[['sigla', 'estado', 'regiao']],
-            on='sigla'
-        )
-        
-        alocacao_por_periodo[t] = df_periodo
-        reducao_por_periodo[t] = round(reducao_periodo, 0)
-        reducao_total += reducao_periodo
-        
-        # Trajetória agregada
-        trajetoria_lista.append({
+    for j, t in enumerate(periodos):
+        alocacao_por_periodo[t] = pd.DataFrame({
+            'sigla': estados,
             'periodo': t,
-            'orcamento_periodo': orcamentos_por_periodo[t-1],
-            'investimento_total': df_periodo['investimento'].sum(),
-            'crimes_base': df_periodo['crimes_base'].sum(),
-            'crimes_apos': df_periodo['crimes_apos'].sum(),
-            'reducao_acumulada': reducao_periodo
+            'investimento': investimentos_2[:, j],
+            'estoque_acumulado': estoque_2[:, j],
+            'crimes_base': crimes_base,
+            'crimes_apos': crimes_apos_0[:, j],
+            'reducao': reducoes_0[:, j],
+            **identificacao
         })
-    
-    df_trajetoria = pd.DataFrame(trajetoria_lista)
+        reducao_por_periodo[t] = round(reducao_periodos[j], 0)
+        reducao_total += reducao_periodos[j]
+    
+    # Trajetória agregada
+    df_trajetoria = pd.DataFrame({
+        'periodo': periodos,
+        'orcamento_periodo': orcamentos_por_periodo,
+        'investimento_total': investimentos_2.sum(axis=0),
+        'crimes_base': np.full(n_periodos, crimes_base.sum()),
+        'crimes_apos': crimes_apos_0.sum(axis=0),
+        'reducao_acumulada': reducao_periodos
+    })
     
     return ResultadoMultiPeriodo(
         status=status,
@@ -264,30 +277,47 @@ def comparar_estrategias(
         n_periodos: Número de períodos
     
     Returns:
-        DataFrame comparativo
+        DataFrame comparativo (a coluna distribuicao traz o orçamento de
+        cada período como tupla)
     """
+    # As 4 otimizações são determinísticas: memoiza pelo conteúdo das colunas
+    # usadas no modelo (tupla de linhas, hashável) e pelos parâmetros. A
+    # cópia rasa basta porque as células do resultado são imutáveis
+    dados = tuple(df_dados[COLUNAS_MODELO].itertuples(index=False, name=None))
+    return _comparar_estrategias_memo(dados, orcamento_total, n_periodos).copy()
+
+
+@lru_cache(maxsize=32)
+def _comparar_estrategias_memo(
+    dados: Tuple[tuple, ...],
+    orcamento_total: float,
+    n_periodos: int
+) -> pd.DataFrame:
+    """Núcleo memoizado de comparar_estrategias (dados como tupla de linhas)."""
+    df_dados = pd.DataFrame(list(dados), columns=COLUNAS_MODELO)
     orcamento_medio = orcamento_total / n_periodos
     
-    estrategias = {
-        'Uniforme': [orcamento_medio] * n_periodos,
-        'Frontloaded': [orcamento_medio * (1 + 0.5 * (n_periodos - t) / n_periodos) 
-                        for t in range(n_periodos)],
-        'Backloaded': [orcamento_medio * (1 + 0.5 * t / n_periodos) 
-                       for t in range(n_periodos)],
-        'Crescente_Linear': [orcamento_medio * (0.5 + t / n_periodos) 
-                             for t in range(n_periodos)]
-    }
+    # Uma linha por estratégia (matriz estratégias x períodos)
+    nomes = ['Uniforme', 'Frontloaded', 'Backloaded', 'Crescente_Linear']
+    t = np.arange(n_periodos)
+    distribuicoes = orcamento_medio * np.stack([
+        np.ones(n_periodos),
+        1 + 0.5 * (n_periodos - t) / n_periodos,
+        1 + 0.5 * t / n_periodos,
+        0.5 + t / n_periodos
+    ])
     
     # Normaliza para somar ao orçamento total
-    for nome in estrategias:
-        soma = sum(estrategias[nome])
-        estrategias[nome] = [x * orcamento_total / soma for x in estrategias[nome]]
+    distribuicoes = distribuicoes * orcamento_total / distribuicoes.sum(axis=1, keepdims=True)
+    orcamentos_estrategias = distribuicoes.tolist()
+    
+    resultados_estrategias = [
+        otimizar_multi_periodo(df_dados, orcamentos) for orcamentos in orcamentos_estrategias
+    ]
     
     resultados = []
     
-    for nome, orcamentos in estrategias.items():
-        resultado = otimizar_multi_periodo(df_dados, orcamentos)
-        
+    for nome, orcamentos, resultado in zip(nomes, orcamentos_estrategias, resultados_estrategias):
         if resultado.status == 'Optimal':
             resultados.append({
                 'estrategia': nome,
@@ -296,7 +326,8 @@ def comparar_estrategias(
                 'reducao_total': resultado.reducao_total_crimes,
                 'reducao_primeiro_periodo': resultado.reducao_por_periodo[1],
                 'reducao_ultimo_periodo': resultado.reducao_por_periodo[n_periodos],
-                'distribuicao': [round(x, 0) for x in orcamentos]
+                # Tupla, e não lista: a célula é compartilhada com o cache
+                'distribuicao': tuple(round(x, 0) for x in orcamentos)
             })
     
     return pd.DataFrame(resultados)
@@ -1,7 +1,7 @@
 # =============================================================================
 # MÓDULO DE OTIMIZAÇÃO - PROGRAMAÇÃO LINEAR PARA ALOCAÇÃO DE RECURSOS
 # =============================================================================
-# Este módulo implementa o modelo de Programação Linear usando PuLP.
+# Este módulo implementa o modelo de Programação Linear de alocação.
 #
 # PROBLEMA DE OTIMIZAÇÃO:
 # Dado um orçamento suplementar disponível, determinar quanto investir
@@ -22,7 +22,9 @@
 #   (4) x_i ≥ 0                              (não-negatividade)
 #
 # MÉTODO DE SOLUÇÃO:
-#   Simplex (via solver CBC do PuLP)
+#   Guloso exato em forma fechada (ver _resolver_alocacao): com limites
+#   por variável e tetos aninhados (total e por região), ordenar os estados
+#   pelo ganho marginal e preencher até os limites dá o ótimo do PL
 #
 # REFERÊNCIAS:
 # - Winston, W. L. "Operations Research: Applications and Algorithms"
@@ -31,13 +33,15 @@
 
 import pandas as pd
 import numpy as np
-from pulp import (
-    LpProblem, LpMinimize, LpVariable, lpSum, 
-    LpStatus, value, PULP_CBC_CMD
-)
-from typing import Tuple, Dict, Optional
+from typing import Tuple, Dict, List, Optional
 from dataclasses import dataclass
 
+# Tetos padrão do modelo, compartilhados pelo solver, pelo valor marginal do
+# orçamento e pela marcação das restrições ativas em sensibilidade.py
+INVESTIMENTO_MAXIMO_PCT = 25.0  # por estado, % do orçamento atual
+MAX_CONCENTRACAO_PCT = 15.0     # por estado, % do orçamento disponível
+MAX_REGIAO_PCT = 40.0           # por região, % do orçamento disponível
+
 
 @dataclass
 class ResultadoOtimizacao:
@@ -51,6 +55,7 @@ class ResultadoOtimizacao:
         reducao_percentual: Redução percentual da taxa de crimes
         alocacao: DataFrame com alocação por estado
         fo_valor: Valor da função objetivo
+        por_regiao: DataFrame com a alocação agregada por região
     """
     status: str
     orcamento_usado: float
@@ -58,21 +63,262 @@ class ResultadoOtimizacao:
     reducao_percentual: float
     alocacao: pd.DataFrame
     fo_valor: float
+    por_regiao: pd.DataFrame = None
+
+
+@dataclass
+class DadosAlocacao:
+    """
+    Parâmetros do modelo de alocação já extraídos de df_dados.
+    
+    Gerado uma vez por preparar_dados_alocacao e reaproveitado pelas
+    varreduras (sensibilidade, cenários), que resolvem o mesmo modelo para
+    vários orçamentos sem repetir a filtragem e a extração das colunas.
+    
+    Attributes:
+        df: Estados com dados completos (sem NaN nas colunas do modelo)
+        estados: Siglas dos estados, na ordem das linhas de df
+        mortes: Mortes violentas por estado
+        orcamento_atual: Orçamento atual de segurança por estado (R$ milhões)
+        elasticidade: Elasticidade crime-investimento por estado
+        regiao_codigo: Código inteiro da região de cada estado
+        regioes: Nome da região de cada código (em ordem alfabética)
+    """
+    df: pd.DataFrame
+    estados: List[str]
+    mortes: np.ndarray
+    orcamento_atual: np.ndarray
+    elasticidade: np.ndarray
+    regiao_codigo: np.ndarray
+    regioes: List[str]
+
+
+def preparar_dados_alocacao(df_dados: pd.DataFrame) -> DadosAlocacao:
+    """
+    Extrai de df_dados os arrays usados pelo modelo de alocação.
+    
+    Args:
+        df_dados: DataFrame com dados consolidados dos estados
+    
+    Returns:
+        DadosAlocacao para passar a otimizar_alocacao(..., dados=...)
+    """
+    # Filtra estados com dados completos (remove NaN)
+    df = df_dados.dropna(subset=['orcamento_2022_milhoes', 'elasticidade', 'mortes_violentas']).copy()
+    regioes, regiao_codigo = np.unique(df['regiao'].to_numpy(), return_inverse=True)
+    
+    return DadosAlocacao(
+        df=df,
+        estados=df['sigla'].tolist(),
+        mortes=df['mortes_violentas'].to_numpy(dtype=float),
+        orcamento_atual=df['orcamento_2022_milhoes'].to_numpy(dtype=float),
+        elasticidade=df['elasticidade'].to_numpy(dtype=float),
+        regiao_codigo=regiao_codigo,
+        regioes=regioes.tolist()
+    )
+
+
+def _resolver_alocacao(
+    ganho: np.ndarray,
+    inv_min: np.ndarray,
+    inv_max: np.ndarray,
+    regiao_codigo: np.ndarray,
+    orcamento_disponivel: float,
+    limite_regiao: float
+) -> Optional[np.ndarray]:
+    """
+    Resolve o PL de alocação em forma fechada (guloso exato).
+    
+    O PL só tem limites por variável, o teto do orçamento total e um teto
+    por região, e as regiões particionam os estados: as restrições formam
+    uma família laminar, e para esse politopo (um polimatroide após
+    descontar os pisos) o guloso por ganho marginal decrescente é ótimo.
+    Cada estado, do maior para o menor ganho, recebe o quanto couber no
+    seu teto, no orçamento restante e no saldo da sua região. Substitui a
+    chamada ao CBC, cujo custo era dominado por subir o processo do solver.
+    
+    Aceita um lote de vetores de ganho (uma linha por cenário, estados no
+    último eixo): o laço percorre as posições do ranking e cada passo é
+    vetorizado entre os cenários, como na varredura do gráfico de tornado.
+    
+    Args:
+        ganho: Redução de mortes por R$ milhão investido em cada estado,
+               shape (n_estados,) ou (n_cenarios, n_estados)
+        inv_min: Piso de investimento por estado
+        inv_max: Teto de investimento por estado
+        regiao_codigo: Código inteiro da região de cada estado
+        orcamento_disponivel: Orçamento total disponível
+        limite_regiao: Teto de investimento por região
+    
+    Returns:
+        Investimento ótimo por estado (no mesmo shape de ganho), ou None
+        se o PL for inviável
+    """
+    teto_regiao = np.full(regiao_codigo.max() + 1 if len(regiao_codigo) else 0, limite_regiao)
+    piso_regiao = np.bincount(regiao_codigo, weights=inv_min, minlength=len(teto_regiao))
+    
+    if (
+        np.any(inv_min > inv_max)
+        or inv_min.sum() > orcamento_disponivel
+        or np.any(piso_regiao > teto_regiao)
+    ):
+        return None
+    
+    ganho = np.asarray(ganho, dtype=float)
+    lote = np.atleast_2d(ganho)
+    cenarios = np.arange(lote.shape[0])
+    
+    investimentos = np.tile(inv_min, (len(cenarios), 1))
+    restante = np.full(len(cenarios), orcamento_disponivel - inv_min.sum())
+    restante_regiao = np.tile(teto_regiao - piso_regiao, (len(cenarios), 1))
+    folga = inv_max - inv_min
+    
+    ordem = np.argsort(-lote, axis=-1, kind='stable')
+    for i in ordem.T:
+        r = regiao_codigo[i]
+        adicional = np.minimum(np.minimum(folga[i], restante), restante_regiao[cenarios, r])
+        # Ganho não positivo ou orçamento esgotado: nada mais a alocar
+        ativo = (lote[cenarios, i] > 0) & (restante > 0) & (adicional > 0)
+        adicional = np.where(ativo, adicional, 0.0)
+        investimentos[cenarios, i] += adicional
+        restante -= adicional
+        restante_regiao[cenarios, r] -= adicional
+    
+    return investimentos.reshape(ganho.shape)
+
+
+def resolver_investimentos(
+    dados: DadosAlocacao,
+    orcamento_disponivel: float,
+    investimento_minimo_pct: float = 0.0,
+    investimento_maximo_pct: float = INVESTIMENTO_MAXIMO_PCT,
+    max_concentracao_pct: float = MAX_CONCENTRACAO_PCT,
+    elasticidade: Optional[np.ndarray] = None,
+    max_regiao_pct: float = MAX_REGIAO_PCT
+) -> Optional[np.ndarray]:
+    """
+    Investimento ótimo por estado, sem montar as tabelas de resultado.
+    
+    Args:
+        dados: Parâmetros preparados por preparar_dados_alocacao
+        orcamento_disponivel: Orçamento total disponível (R$ milhões)
+        investimento_minimo_pct: % mínimo do orçamento atual como piso
+        investimento_maximo_pct: % máximo do orçamento atual como teto
+        max_concentracao_pct: % máximo do orçamento disponível por estado
+        elasticidade: Elasticidades a usar no lugar de dados.elasticidade
+                      (ex.: para variar a de um estado); com shape
+                      (n_cenarios, n_estados) resolve todos os cenários
+                      de uma vez
+        max_regiao_pct: % máximo do orçamento disponível por região
+    
+    Returns:
+        Investimento por estado na ordem de dados.estados (uma linha por
+        cenário se elasticidade for 2D), ou None se o PL for inviável
+    """
+    if elasticidade is None:
+        elasticidade = dados.elasticidade
+    
+    # Calcula limites de investimento por estado
+    # Mínimo: garantir algum investimento proporcional
+    # Máximo: menor entre (% do orçamento atual) e (% do orçamento disponível)
+    # Isso evita concentração excessiva em poucos estados
+    inv_min = dados.orcamento_atual * investimento_minimo_pct / 100
+    inv_max = np.minimum(
+        dados.orcamento_atual * investimento_maximo_pct / 100,
+        orcamento_disponivel * max_concentracao_pct / 100
+    )
+    
+    # Redução de mortes por R$ milhão investido (negativo do coeficiente
+    # da função objetivo de minimização)
+    ganho = dados.mortes * elasticidade / dados.orcamento_atual
+    
+    # Restrição por região: até max_regiao_pct do orçamento disponível em cada uma
+    return _resolver_alocacao(
+        ganho, inv_min, inv_max, dados.regiao_codigo,
+        orcamento_disponivel, orcamento_disponivel * max_regiao_pct / 100
+    )
+
+
+def valor_marginal_orcamento(
+    dados: DadosAlocacao,
+    orcamento_disponivel: float,
+    investimentos: np.ndarray,
+    investimento_maximo_pct: float = INVESTIMENTO_MAXIMO_PCT,
+    max_concentracao_pct: float = MAX_CONCENTRACAO_PCT,
+    max_regiao_pct: float = MAX_REGIAO_PCT,
+    tol: float = 1e-6
+) -> float:
+    """
+    Derivada da redução ótima de mortes em relação ao orçamento disponível.
+    
+    Lida direto da solução do guloso, sem re-resolver o PL. Pelo teorema
+    do envelope, a derivada soma o preço-sombra do orçamento (λ, o maior
+    ganho entre estados com folga no próprio teto e na região) com os
+    preços-sombra dos tetos que crescem junto com o orçamento: o teto de
+    concentração de cada estado (max_concentracao_pct) e o teto de cada
+    região (max_regiao_pct). Os tetos devem ser os mesmos passados a
+    resolver_investimentos.
+    
+    Args:
+        dados: Parâmetros preparados por preparar_dados_alocacao
+        orcamento_disponivel: Orçamento total disponível (R$ milhões)
+        investimentos: Solução de resolver_investimentos para esse orçamento
+        investimento_maximo_pct: % máximo do orçamento atual como teto
+        max_concentracao_pct: % máximo do orçamento disponível por estado
+        max_regiao_pct: % máximo do orçamento disponível por região
+        tol: Tolerância para considerar uma restrição ativa
+    
+    Returns:
+        Vidas salvas por R$ milhão adicional de orçamento
+    """
+    ganho = dados.mortes * dados.elasticidade / dados.orcamento_atual
+    teto_orcamento_atual = dados.orcamento_atual * investimento_maximo_pct / 100
+    teto_concentracao = orcamento_disponivel * max_concentracao_pct / 100
+    teto = np.minimum(teto_orcamento_atual, teto_concentracao)
+    
+    n_regioes = dados.regiao_codigo.max() + 1 if len(dados.regiao_codigo) else 0
+    total_regiao = np.bincount(dados.regiao_codigo, weights=investimentos, minlength=n_regioes)
+    regiao_cheia = total_regiao >= orcamento_disponivel * max_regiao_pct / 100 - tol
+    no_teto = investimentos >= teto - tol
+    
+    # Preço-sombra do orçamento: ganho do estado marginal do guloso
+    livre = ~no_teto & ~regiao_cheia[dados.regiao_codigo]
+    orcamento_esgotado = investimentos.sum() >= orcamento_disponivel - tol
+    lam = max(ganho[livre].max(), 0.0) if orcamento_esgotado and livre.any() else 0.0
+    
+    # Preço-sombra de cada região cheia: quanto o melhor estado com folga
+    # nela ganharia acima de λ se a região pudesse receber mais
+    nu = np.zeros(n_regioes)
+    for r in np.flatnonzero(regiao_cheia):
+        com_folga = (dados.regiao_codigo == r) & ~no_teto
+        if com_folga.any():
+            nu[r] = max(ganho[com_folga].max() - lam, 0.0)
+    
+    # Preço-sombra dos tetos individuais ativos
+    mu = np.where(no_teto, np.maximum(ganho - lam - nu[dados.regiao_codigo], 0.0), 0.0)
+    teto_por_concentracao = teto_concentracao < teto_orcamento_atual
+    
+    return float(
+        lam
+        + max_concentracao_pct / 100 * mu[teto_por_concentracao].sum()
+        + max_regiao_pct / 100 * nu.sum()
+    )
 
 
 def otimizar_alocacao(
     df_dados: pd.DataFrame,
     orcamento_disponivel: float,
     investimento_minimo_pct: float = 0.0,
-    investimento_maximo_pct: float = 25.0,
-    max_concentracao_pct: float = 15.0,
-    verbose: bool = False
+    investimento_maximo_pct: float = INVESTIMENTO_MAXIMO_PCT,
+    max_concentracao_pct: float = MAX_CONCENTRACAO_PCT,
+    verbose: bool = False,
+    dados: Optional[DadosAlocacao] = None
 ) -> ResultadoOtimizacao:
     """
     Resolve o problema de otimização de alocação de recursos.
     
     Este é o ponto central do modelo de Pesquisa Operacional.
-    Usa o método Simplex (via PuLP/CBC) para encontrar a alocação ótima.
+    Resolve o PL em forma fechada (guloso exato) para encontrar a alocação ótima.
     
     Args:
         df_dados: DataFrame com dados consolidados dos estados
@@ -81,7 +327,10 @@ def otimizar_alocacao(
         investimento_minimo_pct: % mínimo do orçamento atual como piso de investimento
         investimento_maximo_pct: % máximo do orçamento atual como teto de investimento
         max_concentracao_pct: % máximo do orçamento disponível que um único estado pode receber
-        verbose: Se True, exibe detalhes do solver
+        verbose: Se True, exibe um resumo da solução
+        dados: Parâmetros já preparados a partir de df_dados (ver
+               preparar_dados_alocacao); evita repetir a preparação em
+               chamadas sucessivas com os mesmos dados
     
     Returns:
         ResultadoOtimizacao com status, alocação e métricas
@@ -91,58 +340,13 @@ def otimizar_alocacao(
     # PREPARAÇÃO DOS DADOS
     # ==========================================================================
     
-    # Filtra estados com dados completos (remove NaN)
-    df = df_dados.dropna(subset=['orcamento_2022_milhoes', 'elasticidade', 'mortes_violentas']).copy()
+    if dados is None:
+        dados = preparar_dados_alocacao(df_dados)
     
-    # Lista de estados (índices do problema)
-    estados = df['sigla'].tolist()
+    df = dados.df
+    estados = dados.estados
     n_estados = len(estados)
     
-    # Extrai parâmetros do modelo
-    mortes = dict(zip(df['sigla'], df['mortes_violentas']))
-    orcamento_atual = dict(zip(df['sigla'], df['orcamento_2022_milhoes']))
-    elasticidade = dict(zip(df['sigla'], df['elasticidade']))
-    regiao = dict(zip(df['sigla'], df['regiao']))
-    
-    # Calcula limites de investimento por estado
-    # Mínimo: garantir algum investimento proporcional
-    # Máximo: menor entre (% do orçamento atual) e (% do orçamento disponível)
-    # Isso evita concentração excessiva em poucos estados
-    inv_min = {e: orcamento_atual[e] * investimento_minimo_pct / 100 for e in estados}
-    inv_max = {
-        e: min(
-            orcamento_atual[e] * investimento_maximo_pct / 100,
-            orcamento_disponivel * max_concentracao_pct / 100
-        ) 
-        for e in estados
-    }
-    
-    # ==========================================================================
-    # CRIAÇÃO DO MODELO DE PROGRAMAÇÃO LINEAR
-    # ==========================================================================
-    
-    # Cria o problema de minimização
-    modelo = LpProblem("Alocacao_Seguranca_Publica", LpMinimize)
-    
-    # --------------------------------------------------------------------------
-    # VARIÁVEIS DE DECISÃO
-    # --------------------------------------------------------------------------
-    # x[i] = investimento adicional no estado i (em R$ milhões)
-    # 
-    # Cada variável tem limite inferior (inv_min) e superior (inv_max)
-    # para garantir uma distribuição equilibrada dos recursos.
-    # --------------------------------------------------------------------------
-    
-    x = {
-        e: LpVariable(
-            name=f"invest_{e}",
-            lowBound=inv_min[e],
-            upBound=inv_max[e],
-            cat='Continuous'  # Variável contínua (não inteira)
-        )
-        for e in estados
-    }
-    
     # --------------------------------------------------------------------------
     # FUNÇÃO OBJETIVO
     # --------------------------------------------------------------------------
@@ -164,105 +368,86 @@ def otimizar_alocacao(
     #
     # Ou equivalentemente, maximizar a redução:
     #   Max Σ [ Crimes[i] × Elasticidade[i] × x[i] / Orçamento[i] ]
-    #
-    # Para manter como minimização, usamos o negativo:
     # --------------------------------------------------------------------------
     
-    modelo += lpSum([
-        -mortes[e] * elasticidade[e] * x[e] / orcamento_atual[e]
-        for e in estados
-    ]), "Funcao_Objetivo_Minimizar_Crimes"
+    coef = -dados.mortes * dados.elasticidade / dados.orcamento_atual
     
     # --------------------------------------------------------------------------
     # RESTRIÇÕES
     # --------------------------------------------------------------------------
-    
-    # Restrição 1: O total investido não pode exceder o orçamento disponível
-    modelo += (
-        lpSum([x[e] for e in estados]) <= orcamento_disponivel,
-        "Restricao_Orcamento_Total"
-    )
-    
-    # Restrição 2: Limite máximo por região (40% do orçamento por região)
-    # Isso evita concentração excessiva em uma única região geográfica
-    regioes_unicas = set(regiao.values())
-    for reg in regioes_unicas:
-        estados_regiao = [e for e in estados if regiao[e] == reg]
-        modelo += (
-            lpSum([x[e] for e in estados_regiao]) <= orcamento_disponivel * 0.40,
-            f"Restricao_Max_Regiao_{reg.replace('-', '_').replace(' ', '_')}"
-        )
-    
-    # Nota: As restrições de limite mínimo e máximo por estado já estão
-    # incorporadas nos limites das variáveis (lowBound e upBound).
+    # (1) O total investido não pode exceder o orçamento disponível
+    # (2) Limite máximo por região (MAX_REGIAO_PCT = 40% do orçamento), o que
+    #     evita concentração excessiva em uma única região geográfica
+    # (3) inv_min <= x[i] <= inv_max (limites das variáveis)
+    # --------------------------------------------------------------------------
     
     # ==========================================================================
     # RESOLUÇÃO DO PROBLEMA
     # ==========================================================================
     
-    # Configura o solver CBC (COIN-OR Branch and Cut)
-    # É um solver open-source eficiente para Programação Linear
-    solver = PULP_CBC_CMD(msg=verbose)
-    
-    # Resolve o problema com tratamento de erros
-    try:
-        modelo.solve(solver)
-    except Exception as e:
-        # Se o solver falhar, retorna status de erro
-        return ResultadoOtimizacao(
-            status=f'SolverError: {str(e)[:50]}',
-            orcamento_usado=0.0,
-            reducao_crimes=0.0,
-            reducao_percentual=0.0,
-            alocacao=pd.DataFrame(),
-            fo_valor=0.0
-        )
+    investimentos = resolver_investimentos(
+        dados, orcamento_disponivel,
+        investimento_minimo_pct, investimento_maximo_pct, max_concentracao_pct
+    )
     
     # ==========================================================================
     # EXTRAÇÃO DOS RESULTADOS
     # ==========================================================================
     
-    status = LpStatus[modelo.status]
-    
     # Se não encontrou solução ótima, retorna com status de erro
-    if status != 'Optimal':
+    if investimentos is None:
         return ResultadoOtimizacao(
-            status=status,
+            status='Infeasible',
             orcamento_usado=0.0,
             reducao_crimes=0.0,
             reducao_percentual=0.0,
             alocacao=pd.DataFrame(),
             fo_valor=0.0
         )
-    
-    # Extrai valores das variáveis de decisão
-    alocacao_lista = []
-    for e in estados:
-        investimento = value(x[e])
-        crimes_antes = mortes[e]
-        
-        # Calcula redução de crimes com o investimento
-        reducao = crimes_antes * elasticidade[e] * investimento / orcamento_atual[e]
-        crimes_depois = crimes_antes - reducao
-        
-        alocacao_lista.append({
-            'sigla': e,
-            'investimento_milhoes': round(investimento, 2),
-            'mortes_antes': int(crimes_antes),
-            'mortes_depois': int(round(crimes_depois)),
-            'reducao_mortes': int(round(reducao)),
-            'reducao_percentual': round(reducao / crimes_antes * 100, 2) if crimes_antes > 0 else 0
-        })
-    
-    df_alocacao = pd.DataFrame(alocacao_lista)
-    
-    # Merge com dados originais para informações adicionais
-    df_alocacao = pd.merge(
+    status = 'Optimal'
+    
+    if verbose:
+        print(f"Alocação ótima: {investimentos.sum():,.2f} de {orcamento_disponivel:,.2f} "
+              f"R$ milhões em {n_estados} estados")
+    
+    # Redução de crimes com o investimento, vetorizada sobre os estados
+    # (o arredondamento em 2 casas segue round() do Python, que é exato)
+    mortes = dados.mortes
+    reducao = mortes * dados.elasticidade * investimentos / dados.orcamento_atual
+    reducao_pct = np.divide(reducao, mortes, out=np.zeros_like(reducao), where=mortes > 0) * 100
+    
+    df_alocacao = pd.DataFrame({
+        'sigla': estados,
+        'investimento_milhoes': [round(v, 2) for v in investimentos.tolist()],
+        'mortes_antes': mortes.astype(int),
+        'mortes_depois': np.rint(mortes - reducao).astype(int),
+        'reducao_mortes': np.rint(reducao).astype(int),
+        'reducao_percentual': [round(v, 2) for v in reducao_pct.tolist()]
+    })
+    
+    # Informações adicionais dos estados: as linhas de df estão na mesma
+    # ordem de estados, então as colunas são anexadas por posição (sem merge)
+    df_alocacao = pd.concat([
         df_alocacao,
-        df[['sigla', 'estado', 'regiao', 'populacao', 'orcamento_2022_milhoes', 'elasticidade']],
-        on='sigla',
-        how='left'
-    )
+        df[['estado', 'regiao', 'populacao', 'orcamento_2022_milhoes', 'elasticidade']].reset_index(drop=True)
+    ], axis=1)
+    
+    # Agrega por região uma única vez (reutilizado pelas abas da interface):
+    # somas por código de região com bincount, sem o groupby do pandas
+    def soma_por_regiao(valores: np.ndarray) -> np.ndarray:
+        return np.bincount(dados.regiao_codigo, weights=valores, minlength=len(dados.regioes))
+    
+    mortes_antes_regiao = soma_por_regiao(df_alocacao['mortes_antes'].to_numpy()).astype(int)
+    reducao_regiao = soma_por_regiao(df_alocacao['reducao_mortes'].to_numpy()).astype(int)
+    df_por_regiao = pd.DataFrame({
+        'regiao': dados.regioes,
+        'mortes_antes': mortes_antes_regiao,
+        'mortes_depois': soma_por_regiao(df_alocacao['mortes_depois'].to_numpy()).astype(int),
+        'reducao_mortes': reducao_regiao,
+        # Soma de valores em centavos: arredondar remove o ruído de ponto flutuante
+        'investimento_milhoes': np.round(soma_por_regiao(df_alocacao['investimento_milhoes'].to_numpy()), 2)
+    })
+    df_por_regiao['reducao_pct'] = (reducao_regiao / mortes_antes_regiao * 100).round(2)
     
     # Calcula métricas agregadas
     orcamento_usado = df_alocacao['investimento_milhoes'].sum()
@@ -276,7 +461,8 @@ def otimizar_alocacao(
         reducao_crimes=reducao_total,
         reducao_percentual=round(reducao_pct_total, 2),
         alocacao=df_alocacao,
-        fo_valor=round(value(modelo.objective), 4)
+        fo_valor=round(sum(c * v for c, v in zip(coef.tolist(), investimentos.tolist())), 4),
+        por_regiao=df_por_regiao
     )
 
 
@@ -416,8 +602,7 @@ if __name__ == "__main__":
     print("\n" + "=" * 70)
     print("ALOCAÇÃO POR REGIÃO")
     print("=" * 70)
-    por_regiao = resultado.alocacao.groupby('regiao').agg({
-        'investimento_milhoes': 'sum',
-        'reducao_mortes': 'sum'
-    }).round(2)
+    por_regiao = resultado.por_regiao.set_index('regiao')[
+        ['investimento_milhoes', 'reducao_mortes']
+    ].round(2)
     print(por_regiao.to_string())
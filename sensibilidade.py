@@ -17,12 +17,20 @@
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, TYPE_CHECKING
+import warnings
 from dataclasses import dataclass
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 
-from otimizacao import otimizar_alocacao, ResultadoOtimizacao
+# O plotly só é importado dentro das funções gerar_grafico_*: as análises
+# numéricas (e quem as importa) não pagam o custo de carregá-lo
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+from otimizacao import (
+    otimizar_alocacao, ResultadoOtimizacao,
+    DadosAlocacao, preparar_dados_alocacao, resolver_investimentos,
+    valor_marginal_orcamento, INVESTIMENTO_MAXIMO_PCT, MAX_CONCENTRACAO_PCT
+)
 
 
 @dataclass
@@ -38,6 +46,39 @@ class ResultadoSensibilidade:
     alocacao_mudou: bool
 
 
+def _resumo_alocacao(
+    dados: DadosAlocacao,
+    orcamento: float
+) -> Optional[Tuple[np.ndarray, float, int, float]]:
+    """
+    Resolve a alocação e calcula as métricas agregadas sem montar tabelas.
+    
+    Nas varreduras o custo de cada cenário é dominado por montar os
+    DataFrames de ResultadoOtimizacao, não pelo guloso; aqui as métricas
+    saem direto dos arrays, com o mesmo arredondamento de otimizar_alocacao.
+    
+    Args:
+        dados: Parâmetros preparados por preparar_dados_alocacao
+        orcamento: Orçamento disponível (R$ milhões)
+    
+    Returns:
+        Tupla (investimento arredondado por estado, orçamento usado,
+        redução de mortes, redução %), ou None se o PL for inviável
+    """
+    investimentos = resolver_investimentos(dados, orcamento)
+    if investimentos is None:
+        return None
+    
+    investimento = np.array([round(v, 2) for v in investimentos.tolist()])
+    reducao = int(np.rint(
+        dados.mortes * dados.elasticidade * investimentos / dados.orcamento_atual
+    ).astype(int).sum())
+    mortes_total = int(dados.mortes.astype(int).sum())
+    reducao_pct = reducao / mortes_total * 100 if mortes_total > 0 else 0
+    
+    return investimento, round(investimento.sum(), 2), reducao, round(reducao_pct, 2)
+
+
 def analisar_sensibilidade_orcamento(
     df_dados: pd.DataFrame,
     orcamento_base: float,
@@ -57,41 +98,46 @@ def analisar_sensibilidade_orcamento(
     Returns:
         DataFrame com resultados para cada cenário de orçamento
     """
-    resultados = []
+    # Os dados do modelo são preparados uma vez para todos os orçamentos
+    dados = preparar_dados_alocacao(df_dados)
     
     # Calcula solução base
-    resultado_base = otimizar_alocacao(df_dados, orcamento_base)
-    
-    # Testa cada variação
-    for var_pct in variacoes_pct:
-        orcamento_var = orcamento_base * (1 + var_pct / 100)
-        
-        resultado = otimizar_alocacao(df_dados, orcamento_var)
-        
-        if resultado.status == 'Optimal':
-            # Calcula métricas comparativas
-            delta_reducao = resultado.reducao_crimes - resultado_base.reducao_crimes
-            eficiencia_marginal = (
-                delta_reducao / (orcamento_var - orcamento_base) 
-                if var_pct != 0 else 0
-            )
-            
-            resultados.append({
-                'variacao_pct': var_pct,
-                'orcamento_milhoes': orcamento_var,
-                'orcamento_usado': resultado.orcamento_usado,
-                'reducao_crimes': resultado.reducao_crimes,
-                'reducao_pct': resultado.reducao_percentual,
-                'delta_reducao': delta_reducao,
-                'eficiencia_marginal': round(eficiencia_marginal, 4),
-                'custo_por_vida': round(
-                    resultado.orcamento_usado / resultado.reducao_crimes 
-                    if resultado.reducao_crimes > 0 else 0, 2
-                ),
-                'status': resultado.status
-            })
-    
-    return pd.DataFrame(resultados)
+    resumo_base = _resumo_alocacao(dados, orcamento_base)
+    reducao_base = resumo_base[2] if resumo_base is not None else 0
+
+    # Resolve cada variação e guarda as métricas em colunas (um array por
+    # métrica); cada solução é só o guloso, sem montar tabelas de resultado
+    variacoes = np.asarray(variacoes_pct, dtype=float)
+    orcamentos = orcamento_base * (1 + variacoes / 100)
+    resumos = [_resumo_alocacao(dados, orc) for orc in orcamentos]
+
+    otimo = np.array([r is not None for r in resumos], dtype=bool)
+    orcamento_usado = np.array([r[1] if r is not None else 0.0 for r in resumos])
+    reducao = np.array([r[2] if r is not None else 0 for r in resumos])
+    reducao_pct = np.array([r[3] if r is not None else 0.0 for r in resumos])
+
+    # Métricas comparativas (vetorizadas)
+    delta_reducao = reducao - reducao_base
+    with np.errstate(divide='ignore', invalid='ignore'):
+        eficiencia_marginal = np.where(
+            variacoes != 0, delta_reducao / (orcamentos - orcamento_base), 0
+        )
+        custo_por_vida = np.where(reducao > 0, orcamento_usado / reducao, 0)
+
+    df_sens = pd.DataFrame({
+        'variacao_pct': np.asarray(variacoes_pct),
+        'orcamento_milhoes': orcamentos,
+        'orcamento_usado': orcamento_usado,
+        'reducao_crimes': reducao,
+        'reducao_pct': reducao_pct,
+        'delta_reducao': delta_reducao,
+        'eficiencia_marginal': np.round(eficiencia_marginal, 4),
+        'custo_por_vida': np.round(custo_por_vida, 2),
+        'status': np.where(otimo, 'Optimal', 'Infeasible')
+    })
+
+    # Mantém apenas os cenários com solução ótima
+    return df_sens[otimo].reset_index(drop=True)
 
 
 def analisar_sensibilidade_elasticidade(
@@ -115,51 +161,49 @@ def analisar_sensibilidade_elasticidade(
     Returns:
         DataFrame com resultados para cada cenário
     """
-    resultados = []
-    
-    # Elasticidade original
-    elast_original = df_dados.loc[
-        df_dados['sigla'] == estado_alvo, 'elasticidade'
-    ].values[0]
+    # Elasticidade original (lookup O(1) pelo índice de siglas)
+    elast_original = df_dados.set_index('sigla').at[estado_alvo, 'elasticidade']
     
     # Resultado base
-    resultado_base = otimizar_alocacao(df_dados, orcamento)
-    invest_base = resultado_base.alocacao.loc[
-        resultado_base.alocacao['sigla'] == estado_alvo, 'investimento_milhoes'
-    ].values[0]
-    
-    for var_pct in variacoes_pct:
-        # Cria cópia e varia elasticidade
-        df_var = df_dados.copy()
-        nova_elast = elast_original * (1 + var_pct / 100)
-        df_var.loc[df_var['sigla'] == estado_alvo, 'elasticidade'] = nova_elast
-        
-        resultado = otimizar_alocacao(df_var, orcamento)
-        
-        if resultado.status == 'Optimal':
-            invest_novo = resultado.alocacao.loc[
-                resultado.alocacao['sigla'] == estado_alvo, 'investimento_milhoes'
-            ].values[0]
-            
-            resultados.append({
-                'estado': estado_alvo,
-                'variacao_elasticidade_pct': var_pct,
-                'elasticidade_original': elast_original,
-                'elasticidade_nova': nova_elast,
-                'investimento_base': invest_base,
-                'investimento_novo': invest_novo,
-                'delta_investimento': invest_novo - invest_base,
-                'reducao_crimes_total': resultado.reducao_crimes,
-                'delta_reducao': resultado.reducao_crimes - resultado_base.reducao_crimes
-            })
-    
-    return pd.DataFrame(resultados)
+    dados = preparar_dados_alocacao(df_dados)
+    resultado_base = otimizar_alocacao(df_dados, orcamento, dados=dados)
+    invest_base = resultado_base.alocacao.set_index('sigla').at[estado_alvo, 'investimento_milhoes']
+    
+    # Só a elasticidade do estado alvo muda: todas as variações são
+    # resolvidas num único lote do guloso, sem copiar o DataFrame
+    i = dados.estados.index(estado_alvo)
+    novas_elast = [elast_original * (1 + var_pct / 100) for var_pct in variacoes_pct]
+    elasticidades = np.tile(dados.elasticidade, (len(novas_elast), 1))
+    elasticidades[:, i] = novas_elast
+    
+    investimentos = resolver_investimentos(dados, orcamento, elasticidade=elasticidades)
+    
+    if investimentos is None:
+        return pd.DataFrame()
+    
+    # Mesmos arredondamentos de otimizar_alocacao
+    invest_novo = np.array([round(v, 2) for v in investimentos[:, i].tolist()])
+    reducoes = np.rint(
+        dados.mortes * elasticidades * investimentos / dados.orcamento_atual
+    ).astype(int).sum(axis=1)
+    
+    return pd.DataFrame({
+        'estado': estado_alvo,
+        'variacao_elasticidade_pct': variacoes_pct,
+        'elasticidade_original': elast_original,
+        'elasticidade_nova': novas_elast,
+        'investimento_base': invest_base,
+        'investimento_novo': invest_novo,
+        'delta_investimento': invest_novo - invest_base,
+        'reducao_crimes_total': reducoes,
+        'delta_reducao': reducoes - resultado_base.reducao_crimes
+    })
 
 
 def calcular_shadow_prices(
     df_dados: pd.DataFrame,
     orcamento: float,
-    delta: float = 100.0
+    delta: Optional[float] = None
 ) -> Dict[str, float]:
     """
     Calcula os preços-sombra (shadow prices) das restrições.
@@ -168,53 +212,55 @@ def calcular_shadow_prices(
     relaxássemos a restrição em uma unidade.
     
     Para a restrição de orçamento:
-    Shadow Price = ΔVidas_Salvas / ΔOrçamento
+    Shadow Price = ∂Vidas_Salvas / ∂Orçamento, lido da solução ótima
+    (ver valor_marginal_orcamento), sem re-resolver o PL
     
     Interpretação: "Cada R$ 1 milhão adicional salva X vidas"
     
     Args:
         df_dados: DataFrame com dados consolidados
         orcamento: Orçamento base
-        delta: Variação para calcular derivada numérica (R$ milhões)
-               Usar delta maior (100) para capturar variação marginal corretamente
+        delta: Obsoleto e ignorado (era o passo da antiga diferença
+               finita); emite DeprecationWarning se informado
     
     Returns:
         Dicionário com preços-sombra por restrição
     """
-    # Resultado base
-    resultado_base = otimizar_alocacao(df_dados, orcamento)
-    
-    # Variação no orçamento total (usa delta maior para capturar variação)
-    resultado_mais = otimizar_alocacao(df_dados, orcamento + delta)
-    resultado_menos = otimizar_alocacao(df_dados, orcamento - delta)
-    
-    # Shadow price do orçamento (derivada central)
-    shadow_orcamento = (
-        resultado_mais.reducao_crimes - resultado_menos.reducao_crimes
-    ) / (2 * delta)
+    if delta is not None:
+        warnings.warn(
+            "calcular_shadow_prices: 'delta' é ignorado, pois o preço-sombra "
+            "agora é a derivada exata lida da solução ótima",
+            DeprecationWarning,
+            stacklevel=2
+        )
+    
+    dados = preparar_dados_alocacao(df_dados)
+    
+    # Solução base; o preço-sombra do orçamento sai dela diretamente
+    investimentos = resolver_investimentos(dados, orcamento)
+    if investimentos is None:
+        investimentos = np.empty(0)
+        shadow_orcamento = 0.0
+    else:
+        shadow_orcamento = valor_marginal_orcamento(dados, orcamento, investimentos)
     
     shadow_prices = {
         'orcamento_total': round(shadow_orcamento, 4),
         'interpretacao': f"Cada R$ 1 milhão adicional salva ~{shadow_orcamento:.2f} vidas"
     }
     
-    # Shadow prices dos limites por estado
-    for _, row in df_dados.iterrows():
-        if pd.isna(row['orcamento_2022_milhoes']):
-            continue
-            
-        estado = row['sigla']
-        
-        # Verifica se a restrição de máximo está ativa
-        aloc = resultado_base.alocacao
-        invest = aloc.loc[aloc['sigla'] == estado, 'investimento_milhoes'].values
-        
-        if len(invest) > 0:
-            limite_max = row['orcamento_2022_milhoes'] * 0.30  # 30% default
-            
-            # Se investimento está no limite, a restrição está ativa
-            if abs(invest[0] - limite_max) < 0.01:
-                shadow_prices[f'limite_max_{estado}'] = "ATIVO"
+    # Limites por estado: a restrição está ativa quando o investimento
+    # (exato, sem arredondamento) está no teto do modelo, o menor entre
+    # INVESTIMENTO_MAXIMO_PCT do orçamento atual e MAX_CONCENTRACAO_PCT do
+    # orçamento disponível (os padrões de resolver_investimentos)
+    if len(investimentos):
+        teto = np.minimum(
+            dados.orcamento_atual * INVESTIMENTO_MAXIMO_PCT / 100,
+            orcamento * MAX_CONCENTRACAO_PCT / 100
+        )
+        ativos = np.isclose(investimentos, teto, rtol=0, atol=1e-6)
+        for sigla in np.asarray(dados.estados)[ativos].tolist():
+            shadow_prices[f'limite_max_{sigla}'] = "ATIVO"
     
     return shadow_prices
 
@@ -223,7 +269,7 @@ def gerar_grafico_tornado(
     df_dados: pd.DataFrame,
     orcamento: float,
     top_n: int = 10
-) -> go.Figure:
+) -> 'go.Figure':
     """
     Gera gráfico de tornado mostrando sensibilidade aos parâmetros.
     
@@ -238,39 +284,44 @@ def gerar_grafico_tornado(
     Returns:
         Figura Plotly com gráfico de tornado
     """
+    import plotly.graph_objects as go
+    
     # Resultado base
-    resultado_base = otimizar_alocacao(df_dados, orcamento)
+    dados = preparar_dados_alocacao(df_dados)
+    resultado_base = otimizar_alocacao(df_dados, orcamento, dados=dados)
     base_reducao = resultado_base.reducao_crimes
     
-    impactos = []
+    # Testa variação de elasticidade de +/- 20% para cada estado: só a
+    # elasticidade muda, então todas as 2 × n_estados variações são
+    # resolvidas num único lote do guloso sobre os arrays preparados
+    n_estados = len(dados.estados)
+    variacoes = np.array([-0.20, 0.20])
+    estado_idx = np.repeat(np.arange(n_estados), len(variacoes))
+    fatores = np.tile(1 + variacoes, n_estados)
     
-    # Testa variação de elasticidade para cada estado
-    for _, row in df_dados.iterrows():
-        if pd.isna(row['elasticidade']):
-            continue
-        
-        estado = row['sigla']
-        elast_original = row['elasticidade']
-        
-        # Varia elasticidade em +/- 20%
-        for var in [-0.20, 0.20]:
-            df_var = df_dados.copy()
-            df_var.loc[df_var['sigla'] == estado, 'elasticidade'] = elast_original * (1 + var)
-            
-            resultado = otimizar_alocacao(df_var, orcamento)
-            
-            if resultado.status == 'Optimal':
-                impacto = resultado.reducao_crimes - base_reducao
-                impactos.append({
-                    'parametro': f"Elasticidade {estado}",
-                    'variacao': '+20%' if var > 0 else '-20%',
-                    'impacto': impacto,
-                    'impacto_abs': abs(impacto)
-                })
+    elasticidades = np.tile(dados.elasticidade, (len(estado_idx), 1))
+    linhas = np.arange(len(estado_idx))
+    elasticidades[linhas, estado_idx] = dados.elasticidade[estado_idx] * fatores
     
-    # Ordena por impacto absoluto
-    df_impactos = pd.DataFrame(impactos)
+    investimentos = resolver_investimentos(dados, orcamento, elasticidade=elasticidades)
     
+    if investimentos is None:
+        return go.Figure()
+    
+    # Mesmo arredondamento por estado de otimizar_alocacao
+    reducoes = np.rint(
+        dados.mortes * elasticidades * investimentos / dados.orcamento_atual
+    ).astype(int).sum(axis=1)
+    impacto = reducoes - base_reducao
+    
+    df_impactos = pd.DataFrame({
+        'parametro': [f"Elasticidade {dados.estados[i]}" for i in estado_idx],
+        'variacao': np.where(np.tile(variacoes, n_estados) > 0, '+20%', '-20%'),
+        'impacto': impacto,
+        'impacto_abs': np.abs(impacto)
+    })
+    
+    # Ordena por impacto absoluto
     if len(df_impactos) == 0:
         return go.Figure()
     
@@ -325,7 +376,7 @@ def gerar_grafico_tornado(
 
 def gerar_grafico_sensibilidade_orcamento(
     df_sensibilidade: pd.DataFrame
-) -> go.Figure:
+) -> 'go.Figure':
     """
     Gera gráfico de sensibilidade ao orçamento.
     
@@ -338,6 +389,9 @@ def gerar_grafico_sensibilidade_orcamento(
     Returns:
         Figura Plotly com gráficos combinados
     """
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    
     fig = make_subplots(
         rows=2, cols=1,
         subplot_titles=(
@@ -402,23 +456,27 @@ def analisar_cenarios(
         DataFrame comparativo entre cenários
     """
     resultados = []
+    dados = preparar_dados_alocacao(df_dados)
     
     for nome, orcamento in orcamentos.items():
-        resultado = otimizar_alocacao(df_dados, orcamento)
+        resumo = _resumo_alocacao(dados, orcamento)
         
-        if resultado.status == 'Optimal':
-            # Top 3 estados por investimento
-            top3 = resultado.alocacao.nlargest(3, 'investimento_milhoes')['sigla'].tolist()
+        if resumo is not None:
+            investimento, _, reducao, reducao_pct = resumo
+            
+            # Top 3 estados por investimento (empates mantêm a ordem dos
+            # dados, como em nlargest)
+            top3 = [dados.estados[i] for i in np.argsort(-investimento, kind='stable')[:3]]
             
             resultados.append({
                 'cenario': nome,
                 'orcamento_milhoes': orcamento,
                 'orcamento_bilhoes': orcamento / 1000,
-                'reducao_crimes': resultado.reducao_crimes,
-                'reducao_pct': resultado.reducao_percentual,
-                'custo_por_vida': round(orcamento / resultado.reducao_crimes, 2),
+                'reducao_crimes': reducao,
+                'reducao_pct': reducao_pct,
+                'custo_por_vida': round(orcamento / reducao, 2),
                 'top_3_estados': ', '.join(top3),
-                'estados_atendidos': (resultado.alocacao['investimento_milhoes'] > 0).sum()
+                'estados_atendidos': (investimento > 0).sum()
             })
     
     return pd.DataFrame(resultados)